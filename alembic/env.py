@@ -11,7 +11,7 @@ from backend.models.product import Product, DailyStock, DailyClose
 from backend.models.sales import Sale
 from backend.models.debtors import Debtor, DebtTransaction
 from backend.models.reconciliation import Expense, Reconciliation, ReconciliationLine
-from backend.models.purchases import Supplier, Purchase
+from backend.models.purchases import Supplier, Purchase, SupplierPayment
 from backend.models.wholesale import WholesaleClient, WholesaleSale
 from backend.models.waiter import Waiter, WaiterBill
 from backend.models.user import User
@@ -20,6 +20,10 @@ from backend.models.ConversionHistory import ConversionHistory
 from backend.models.cashmovements import CashMovement
 from backend.models.purchase_undo import PurchaseUndoLog
 from backend.models.purchase_offer import PurchaseOffer
+from backend.models.cash_ledger import CashLedgerDay, CashFlowCategory
+from backend.models.sales_fact import DailySalesFact
+from backend.models.period_close import PeriodClose
+from backend.models.cost_layer import CostLayer
 
 target_metadata = db.metadata
 config = context.config
@@ -0,0 +1,51 @@
+"""add date indexes on hot report tables
+
+Revision ID: 35ee7b71485f
+Revises: 987057fe1c95
+Create Date: 2026-10-17 12:48:55.093127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '35ee7b71485f'
+down_revision: Union[str, Sequence[str], None] = '987057fe1c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_sale_date', 'sale', ['date']),
+    ('ix_sale_product_date', 'sale', ['product_id', 'date']),
+    ('ix_sale_adjustments_sale_voided', 'sale_adjustments', ['sale_id', 'is_voided']),
+    ('ix_daily_close_date', 'daily_close', ['date']),
+    ('ix_daily_close_product_date', 'daily_close', ['product_id', 'date']),
+    ('ix_cash_movements_date_type', 'cash_movements', ['date', 'type']),
+    ('ix_expense_date', 'expense', ['date']),
+    ('ix_reconciliation_date_created_id', 'reconciliation', ['date', 'created_at', 'id']),
+    ('ix_reconciliation_line_reconciliation_id', 'reconciliation_line', ['reconciliation_id']),
+    ('ix_debt_transaction_debtor_date', 'debt_transaction', ['debtor_id', 'date']),
+    ('ix_debt_payment_transaction_id', 'debt_payment', ['transaction_id']),
+    ('ix_purchase_purchase_date', 'purchase', ['purchase_date']),
+    ('ix_purchase_supplier_date', 'purchase', ['supplier_id', 'purchase_date']),
+    ('ix_purchase_product_date', 'purchase', ['product_id', 'purchase_date']),
+    ('ix_conversion_history_timestamp', 'conversion_history', ['timestamp']),
+    ('ix_waiter_bill_waiter_settled', 'waiter_bill', ['waiter_id', 'is_settled']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,69 @@
+"""add daily_sales_fact
+
+Revision ID: 4a7c2e91d0b3
+Revises: de4d148dd456
+Create Date: 2026-10-17 14:22:07.318846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7c2e91d0b3'
+down_revision: Union[str, Sequence[str], None] = 'de4d148dd456'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'daily_sales_fact',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=10), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('profit', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', 'product_id', 'source', name='uq_daily_sales_fact_key'),
+    )
+    op.create_index('ix_daily_sales_fact_source_date', 'daily_sales_fact', ['source', 'date'])
+
+    # Backfill from existing sales and daily closes
+    op.execute(
+        """
+        INSERT INTO daily_sales_fact (date, product_id, source, units, revenue, cost, profit)
+        SELECT CAST(date AS DATE), product_id, 'sale',
+               SUM(adjusted_quantity),
+               SUM(adjusted_total_price),
+               SUM(adjusted_total_cost),
+               SUM(adjusted_total_price - adjusted_total_cost)
+        FROM sale
+        GROUP BY CAST(date AS DATE), product_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO daily_sales_fact (date, product_id, source, units, revenue, cost, profit)
+        SELECT date, product_id, 'close',
+               SUM(units_sold),
+               SUM(revenue),
+               SUM(revenue - profit),
+               SUM(profit)
+        FROM daily_close
+        GROUP BY date, product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_sales_fact_source_date', table_name='daily_sales_fact')
+    op.drop_table('daily_sales_fact')
@@ -0,0 +1,50 @@
+"""add period_close snapshots
+
+Revision ID: 5e3b9a17c4d8
+Revises: c81f5d02a6e4
+Create Date: 2026-10-17 15:41:12.506318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e3b9a17c4d8'
+down_revision: Union[str, Sequence[str], None] = 'c81f5d02a6e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'period_close',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('period_end', sa.Date(), nullable=False),
+        sa.Column('total_sales', sa.Float(), nullable=False),
+        sa.Column('total_cogs', sa.Float(), nullable=False),
+        sa.Column('total_expenses', sa.Float(), nullable=False),
+        sa.Column('retained_earnings', sa.Float(), nullable=False),
+        sa.Column('cash', sa.Float(), nullable=False),
+        sa.Column('receivables', sa.Float(), nullable=False),
+        sa.Column('inventory_value', sa.Float(), nullable=False),
+        sa.Column('fixed_assets', sa.Float(), nullable=False),
+        sa.Column('closed_by', sa.String(length=50), nullable=True),
+        sa.Column('closed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('period_end'),
+    )
+
+    # Window scans for "movements since the last snapshot"
+    op.create_index('ix_debt_transaction_date', 'debt_transaction', ['date'])
+    op.create_index('ix_debt_payment_date', 'debt_payment', ['date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_debt_payment_date', table_name='debt_payment')
+    op.drop_index('ix_debt_transaction_date', table_name='debt_transaction')
+    op.drop_table('period_close')
@@ -0,0 +1,81 @@
+"""add supplier payables ledger
+
+Revision ID: 7d2f4c8e1a93
+Revises: 5e3b9a17c4d8
+Create Date: 2026-10-17 18:32:47.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4c8e1a93'
+down_revision: Union[str, Sequence[str], None] = '5e3b9a17c4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'supplier_payment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('supplier_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('reference', sa.String(length=120), nullable=True),
+        sa.Column('paid_by', sa.String(length=80), nullable=True),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['supplier_id'], ['supplier.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_supplier_payment_date', 'supplier_payment', ['date'])
+    op.create_index('ix_supplier_payment_supplier_date', 'supplier_payment', ['supplier_id', 'date'])
+
+    op.add_column(
+        'period_close',
+        sa.Column('payables', sa.Float(), nullable=False, server_default='0'),
+    )
+    op.alter_column('period_close', 'payables', server_default=None)
+
+    # Purchases so far were paid on delivery: settle each supplier's
+    # purchases per day with a payment on that day, so payables are zero
+    # at every past date (and in existing snapshots). No cash movement is
+    # posted; those purchases never went through the cash ledger.
+    op.execute("""
+        INSERT INTO supplier_payment (supplier_id, amount, reference, paid_by, date)
+        SELECT supplier_id, SUM(total_cost), 'Paid on delivery (before payables ledger)',
+               'migration', MAX(purchase_date)
+        FROM purchase
+        GROUP BY supplier_id, CAST(purchase_date AS DATE)
+    """)
+
+    op.execute("""
+        UPDATE supplier SET
+            total_amount_owed = COALESCE(
+                (SELECT SUM(total_cost) FROM purchase WHERE purchase.supplier_id = supplier.id), 0),
+            total_amount_paid = COALESCE(
+                (SELECT SUM(amount) FROM supplier_payment WHERE supplier_payment.supplier_id = supplier.id), 0),
+            status = 'paid'
+    """)
+    op.alter_column('supplier', 'total_amount_owed', existing_type=sa.Float(), nullable=False)
+    op.alter_column('supplier', 'total_amount_paid', existing_type=sa.Float(), nullable=False)
+
+    op.execute("""
+        INSERT INTO cash_flow_category (category, section)
+        VALUES ('supplier', 'operating')
+        ON CONFLICT (category) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM cash_flow_category WHERE category = 'supplier'")
+    op.alter_column('supplier', 'total_amount_paid', existing_type=sa.Float(), nullable=True)
+    op.alter_column('supplier', 'total_amount_owed', existing_type=sa.Float(), nullable=True)
+    op.drop_column('period_close', 'payables')
+    op.drop_index('ix_supplier_payment_supplier_date', table_name='supplier_payment')
+    op.drop_index('ix_supplier_payment_date', table_name='supplier_payment')
+    op.drop_table('supplier_payment')
@@ -0,0 +1,67 @@
+"""add running balances to debt_transaction and debtor
+
+Revision ID: 987057fe1c95
+Revises: bf7daa2ffd6d
+Create Date: 2026-10-17 11:26:02.447915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '987057fe1c95'
+down_revision: Union[str, Sequence[str], None] = 'bf7daa2ffd6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('debt_transaction', sa.Column('paid_amount', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('debt_transaction', sa.Column('outstanding_amount', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('debtor', sa.Column('total_outstanding', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from payment history
+    op.execute(
+        """
+        UPDATE debt_transaction t
+        SET paid_amount = COALESCE(p.paid, 0),
+            outstanding_amount = t.amount - COALESCE(p.paid, 0)
+        FROM debt_transaction t2
+        LEFT JOIN (
+            SELECT transaction_id, SUM(amount) AS paid
+            FROM debt_payment
+            GROUP BY transaction_id
+        ) p ON p.transaction_id = t2.id
+        WHERE t.id = t2.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE debtor d
+        SET total_outstanding = s.total
+        FROM (
+            SELECT debtor_id, SUM(outstanding_amount) AS total
+            FROM debt_transaction
+            GROUP BY debtor_id
+        ) s
+        WHERE s.debtor_id = d.id
+        """
+    )
+
+    op.create_index(
+        'ix_debt_transaction_due_outstanding',
+        'debt_transaction',
+        ['due_date', 'outstanding_amount'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_debt_transaction_due_outstanding', table_name='debt_transaction')
+    op.drop_column('debtor', 'total_outstanding')
+    op.drop_column('debt_transaction', 'outstanding_amount')
+    op.drop_column('debt_transaction', 'paid_amount')
@@ -0,0 +1,48 @@
+"""add cash_ledger_daily rollup
+
+Revision ID: 9fd82e56eef2
+Revises: 1c1bf110b191
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9fd82e56eef2'
+down_revision: Union[str, Sequence[str], None] = '1c1bf110b191'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'cash_ledger_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('type', sa.String(length=10), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('movement_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', 'category', 'type', name='uq_cash_ledger_daily_key'),
+    )
+
+    # Backfill from existing history
+    op.execute(
+        """
+        INSERT INTO cash_ledger_daily (date, category, type, amount, movement_count)
+        SELECT date, category, type, SUM(amount), COUNT(id)
+        FROM cash_movements
+        GROUP BY date, category, type
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cash_ledger_daily')
@@ -0,0 +1,59 @@
+"""add inventory cost layers
+
+Revision ID: a4c81e6f2d57
+Revises: 7d2f4c8e1a93
+Create Date: 2026-10-17 21:06:12.530418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c81e6f2d57'
+down_revision: Union[str, Sequence[str], None] = '7d2f4c8e1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'cost_layer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('purchase_id', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('remaining', sa.Integer(), nullable=False),
+        sa.Column('unit_cost', sa.Float(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['purchase_id'], ['purchase.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_cost_layer_open', 'cost_layer', ['product_id', 'received_at', 'id'],
+        postgresql_where=sa.text('remaining > 0'),
+    )
+    op.create_index('ix_cost_layer_purchase', 'cost_layer', ['purchase_id'])
+
+    # Stock on hand becomes one opening layer per product at its current
+    # cost price, so inventory valuation is unchanged by the upgrade
+    op.execute(
+        """
+        INSERT INTO cost_layer (product_id, source, purchase_id, quantity, remaining, unit_cost, received_at)
+        SELECT id, 'opening', NULL, stock, stock, COALESCE(cost_price, 0), now()
+        FROM product
+        WHERE stock > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cost_layer_purchase', table_name='cost_layer')
+    op.drop_index('ix_cost_layer_open', table_name='cost_layer')
+    op.drop_table('cost_layer')
@@ -0,0 +1,31 @@
+"""make reconciliation.created_at not null
+
+Revision ID: b6e29d4f8c13
+Revises: a4c81e6f2d57
+Create Date: 2026-10-17 22:41:05.274913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e29d4f8c13'
+down_revision: Union[str, Sequence[str], None] = 'a4c81e6f2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The history keyset pages on (date, created_at, id); a NULL would be
+    # skipped by the tuple comparison and break the cursor
+    op.execute("UPDATE reconciliation SET created_at = date WHERE created_at IS NULL")
+    op.alter_column('reconciliation', 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('reconciliation', 'created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,44 @@
+"""add cash_flow_category mapping
+
+Revision ID: bf7daa2ffd6d
+Revises: 9fd82e56eef2
+Create Date: 2026-10-17 10:04:18.530771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bf7daa2ffd6d'
+down_revision: Union[str, Sequence[str], None] = '9fd82e56eef2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cash_flow_category = op.create_table(
+        'cash_flow_category',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('section', sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('category'),
+    )
+
+    # Same mapping the report used to hard-code
+    op.bulk_insert(cash_flow_category, [
+        {'category': 'sales', 'section': 'operating'},
+        {'category': 'expense', 'section': 'operating'},
+        {'category': 'asset', 'section': 'investing'},
+        {'category': 'loan', 'section': 'financing'},
+        {'category': 'owner', 'section': 'financing'},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cash_flow_category')
@@ -0,0 +1,28 @@
+"""add data_version_seq for report cache invalidation
+
+Revision ID: c81f5d02a6e4
+Revises: 4a7c2e91d0b3
+Create Date: 2026-10-17 15:03:44.120937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5d02a6e4'
+down_revision: Union[str, Sequence[str], None] = '4a7c2e91d0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('data_version_seq')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('data_version_seq')))
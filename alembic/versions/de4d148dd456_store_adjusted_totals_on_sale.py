@@ -0,0 +1,57 @@
+"""store adjusted totals on sale
+
+Revision ID: de4d148dd456
+Revises: 35ee7b71485f
+Create Date: 2026-10-17 13:40:21.772604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'de4d148dd456'
+down_revision: Union[str, Sequence[str], None] = '35ee7b71485f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sale', sa.Column('adjusted_quantity', sa.Integer(), nullable=True))
+    op.add_column('sale', sa.Column('adjusted_total_price', sa.Float(), nullable=True))
+    op.add_column('sale', sa.Column('adjusted_total_cost', sa.Float(), nullable=True))
+
+    # Backfill: original totals plus every non-voided adjustment
+    op.execute(
+        """
+        UPDATE sale s
+        SET adjusted_quantity = s.quantity + COALESCE(a.quantity_delta, 0),
+            adjusted_total_price = s.total_price + COALESCE(a.price_delta, 0),
+            adjusted_total_cost = s.total_cost + COALESCE(a.cost_delta, 0)
+        FROM sale s2
+        LEFT JOIN (
+            SELECT sale_id,
+                   SUM(quantity_delta) AS quantity_delta,
+                   SUM(price_delta) AS price_delta,
+                   SUM(cost_delta) AS cost_delta
+            FROM sale_adjustments
+            WHERE is_voided IS NOT TRUE
+            GROUP BY sale_id
+        ) a ON a.sale_id = s2.id
+        WHERE s.id = s2.id
+        """
+    )
+
+    op.alter_column('sale', 'adjusted_quantity', nullable=False)
+    op.alter_column('sale', 'adjusted_total_price', nullable=False)
+    op.alter_column('sale', 'adjusted_total_cost', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sale', 'adjusted_total_cost')
+    op.drop_column('sale', 'adjusted_total_price')
+    op.drop_column('sale', 'adjusted_quantity')
@@ -1,27 +1,13 @@
+import click
 from flask import Flask, request
-from flask_migrate import Migrate
 from .extensions import db, bcrypt, jwt, cors
 from .config import Config
-
-# Import blueprints
-from .routes.auth_routes import auth_bp
-from .routes.role_routes import role_bp
-from .routes.admin import admin_bp
-from .routes.dashboard import dashboard_bp
-from .routes.product_routes import products_bp
-from .routes.sales_routes import sales_bp
-from .routes.purchases import purchases_bp
-from .routes.utils import utils_bp
-from .routes.conversion import conversion_bp
-from .routes.reconciliation import recon_bp
-from .routes.expenses import expenses_bp
-from .routes.reports_bp import reports_bp
-from .routes.special_stock import special_bp
+from .commands import register_commands
+from .utils.report_cache import report_cache
+from .utils.jobs import pdf_jobs
 
 import os
 
-migrate = Migrate()
-
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
@@ -49,20 +35,42 @@ def create_app():
     db.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
-    migrate.init_app(app, db)
+
+    # Flask-Migrate pulls in alembic; only `flask db ...` needs it
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    report_cache.init_app(app)
+    pdf_jobs.init_app(app)
 
     # 👇 IMPORTANT: import models so Alembic sees them
     from .models import (
         Product, DailyStock, DailyClose, Sale,
         Debtor, DebtTransaction,
         Expense, Reconciliation, ReconciliationLine,
-        Supplier, Purchase,
+        Supplier, Purchase, SupplierPayment,
         WholesaleClient, WholesaleSale,
         Waiter, WaiterBill,
         User, FixedAsset, AccountsReceivable,
-        ConversionHistory, CashMovement)
+        ConversionHistory, CashMovement, CashLedgerDay, CashFlowCategory,
+        DailySalesFact, PeriodClose, CostLayer)
+
+    # Register blueprints (imported here so `import backend.app` stays cheap)
+    from .routes.auth_routes import auth_bp
+    from .routes.role_routes import role_bp
+    from .routes.admin import admin_bp
+    from .routes.dashboard import dashboard_bp
+    from .routes.product_routes import products_bp
+    from .routes.sales_routes import sales_bp
+    from .routes.purchases import purchases_bp
+    from .routes.utils import utils_bp
+    from .routes.conversion import conversion_bp
+    from .routes.reconciliation import recon_bp
+    from .routes.expenses import expenses_bp
+    from .routes.reports_bp import reports_bp
+    from .routes.special_stock import special_bp
 
-    # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(role_bp)
     app.register_blueprint(admin_bp)
@@ -76,14 +84,31 @@ def create_app():
     app.register_blueprint(expenses_bp)
     app.register_blueprint(reports_bp)
     app.register_blueprint(special_bp, url_prefix="/api/special")
+
+    # CLI maintenance commands (flask cash-ledger rebuild, ...)
+    register_commands(app)
     
+    # Writes dated into a closed month (see utils.period_lock)
+    from .utils.period_lock import PeriodClosedError
+
+    @app.errorhandler(PeriodClosedError)
+    def period_closed(e):
+        db.session.rollback()
+        return {"error": str(e)}, 409
+
     @app.route("/")
     def health():
         return {"status": "ok"}, 200
-    
-    print("Registered routes:")
-    for rule in app.url_map.iter_rules():
-        print(rule)
+
+    @app.before_request
+    def handle_options():
+        if request.method == "OPTIONS":
+            return {}, 200
+
+    if app.debug or app.config["LOG_ROUTES"]:
+        print("Registered routes:")
+        for rule in app.url_map.iter_rules():
+            print(rule)
 
 
     return app
@@ -114,22 +139,28 @@ def seed_admin():
     else:
         print(f"ℹ️ Admin already exists: {admin_email}")
 
+    # Default cash flow category -> section mapping
+    from .utils.cash_ledger import seed_cash_flow_categories
+    seed_cash_flow_categories()
+    db.session.commit()
+
 
 # ---------------------
 # App creation
 # ---------------------
-app = create_app()
-
-@app.before_request
-def handle_options():
-    if request.method == "OPTIONS":
-        return {}, 200
+def __getattr__(name):
+    # `backend.app:app` (gunicorn, FLASK_APP) builds the app on first access
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ---------------------
 # Run server (for local dev only)
 # ---------------------
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         # Optional: create tables locally if needed
         db.create_all()
@@ -0,0 +1,155 @@
+# backend/commands.py
+import click
+from flask.cli import AppGroup
+from .extensions import db
+
+cash_ledger_cli = AppGroup("cash-ledger", help="Daily cash ledger maintenance.")
+
+
+@cash_ledger_cli.command("rebuild")
+def rebuild_cash_ledger_command():
+    """Backfill / repair the daily cash ledger from cash_movements."""
+    from .utils.cash_ledger import rebuild_cash_ledger
+
+    rows = rebuild_cash_ledger()
+    db.session.commit()
+    click.echo(f"✅ Cash ledger rebuilt: {rows} daily rows")
+
+
+debts_cli = AppGroup("debts", help="Debtor balance maintenance.")
+
+
+@debts_cli.command("check")
+@click.option("--fix", is_flag=True, help="Overwrite drifted balances with recomputed values.")
+def check_debts_command(fix):
+    """Recompute debt balances from payments and report drift."""
+    from .utils.debt_ledger import check_debt_balances
+
+    drift = check_debt_balances(fix=fix)
+
+    for t in drift["transactions"]:
+        click.echo(
+            f"transaction {t['id']} (debtor {t['debtor_id']}): "
+            f"paid {t['stored_paid']} -> {t['actual_paid']}, "
+            f"outstanding {t['stored_outstanding']} -> {t['actual_outstanding']}"
+        )
+    for d in drift["debtors"]:
+        click.echo(f"debtor {d['id']} ({d['name']}): total {d['stored_total']} -> {d['actual_total']}")
+
+    if not drift["transactions"] and not drift["debtors"]:
+        click.echo("✅ Debt balances are consistent")
+    elif fix:
+        db.session.commit()
+        click.echo("✅ Drifted balances corrected")
+    else:
+        click.echo("⚠️ Drift found, re-run with --fix to correct")
+
+
+payables_cli = AppGroup("payables", help="Supplier payables balance maintenance.")
+
+
+@payables_cli.command("check")
+@click.option("--fix", is_flag=True, help="Overwrite drifted balances with recomputed values.")
+def check_payables_command(fix):
+    """Recompute supplier balances from purchases and payments and report drift."""
+    from .utils.supplier_ledger import check_supplier_balances
+
+    drift = check_supplier_balances(fix=fix)
+
+    for s in drift:
+        click.echo(
+            f"supplier {s['id']} ({s['name']}): "
+            f"owed {s['stored_owed']} -> {s['actual_owed']}, "
+            f"paid {s['stored_paid']} -> {s['actual_paid']}"
+        )
+
+    if not drift:
+        click.echo("✅ Supplier balances are consistent")
+    elif fix:
+        db.session.commit()
+        click.echo("✅ Drifted balances corrected")
+    else:
+        click.echo("⚠️ Drift found, re-run with --fix to correct")
+
+
+cost_layers_cli = AppGroup("cost-layers", help="Inventory cost layer maintenance.")
+
+
+@cost_layers_cli.command("check")
+@click.option("--fix", is_flag=True, help="Bring open layer units back in line with stock.")
+def check_cost_layers_command(fix):
+    """Compare each product's open cost layer units with its stock and report drift."""
+    from .utils.cost_layers import check_cost_layers
+
+    drift = check_cost_layers(fix=fix)
+
+    for p in drift:
+        click.echo(f"product {p['id']} ({p['name']}): stock {p['stock']}, layers hold {p['layer_units']}")
+
+    if not drift:
+        click.echo("✅ Cost layers match stock")
+    elif fix:
+        db.session.commit()
+        click.echo("✅ Cost layers corrected")
+    else:
+        click.echo("⚠️ Drift found, re-run with --fix to correct")
+
+
+sales_fact_cli = AppGroup("sales-fact", help="Daily sales fact table maintenance.")
+
+
+@sales_fact_cli.command("rebuild")
+def rebuild_sales_fact_command():
+    """Backfill / repair daily_sales_fact from sale and daily_close."""
+    from .utils.sales_fact import rebuild_sales_fact
+
+    rows = rebuild_sales_fact()
+    db.session.commit()
+    click.echo(f"✅ Sales fact rebuilt: {rows} daily rows")
+
+
+periods_cli = AppGroup("periods", help="Month-end period closing.")
+
+
+@periods_cli.command("close")
+@click.argument("month", required=False)
+def close_period_command(month):
+    """Snapshot MONTH (YYYY-MM, default: last month) for the balance sheet."""
+    from datetime import date
+    from .services.period_close import close_period, month_end
+
+    if month:
+        year, mon = (int(part) for part in month.split("-"))
+    else:
+        first = date.today().replace(day=1)
+        year, mon = (first.year - 1, 12) if first.month == 1 else (first.year, first.month - 1)
+
+    try:
+        snapshot = close_period(month_end(year, mon), closed_by="cli")
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    db.session.commit()
+    click.echo(f"✅ Period closed through {snapshot.period_end.isoformat()}: retained earnings {snapshot.retained_earnings:.2f}")
+
+
+@periods_cli.command("reopen")
+def reopen_period_command():
+    """Delete the latest month-end snapshot so writes into that month are accepted again."""
+    from .services.period_close import reopen_latest_period
+
+    snapshot = reopen_latest_period()
+    if not snapshot:
+        raise click.ClickException("No closed periods")
+
+    db.session.commit()
+    click.echo(f"✅ Period ending {snapshot.period_end.isoformat()} reopened")
+
+
+def register_commands(app):
+    app.cli.add_command(cash_ledger_cli)
+    app.cli.add_command(debts_cli)
+    app.cli.add_command(payables_cli)
+    app.cli.add_command(cost_layers_cli)
+    app.cli.add_command(sales_fact_cli)
+    app.cli.add_command(periods_cli)
@@ -19,5 +19,5 @@ alembic upgrade head
 echo "Current DB revision:"
 alembic current
 
-echo "Starting Gunicorn..."
-exec gunicorn backend.app:app --bind 0.0.0.0:$PORT --workers 3
+echo "Starting Gunicorn (${GUNICORN_WORKER_CLASS:-sync} workers)..."
+exec gunicorn backend.app:app -c backend/gunicorn.conf.py
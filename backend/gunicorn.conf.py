@@ -0,0 +1,25 @@
+# backend/gunicorn.conf.py
+#
+# GUNICORN_WORKER_CLASS selects the serving mode:
+#   sync    - one request per worker (default)
+#   gthread - GUNICORN_THREADS requests per worker on OS threads
+#   gevent  - up to GUNICORN_WORKER_CONNECTIONS requests per worker on
+#             greenlets; psycopg2 is made cooperative below
+# In the concurrent modes size DB_POOL_SIZE + DB_MAX_OVERFLOW to the
+# per-worker concurrency you expect to hit the database at once.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+threads = int(os.getenv("GUNICORN_THREADS", "8" if worker_class == "gthread" else "1"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "100"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+
+def post_worker_init(worker):
+    # gevent patches sockets, but psycopg2 talks to Postgres in C; without a
+    # wait callback every query would block the whole worker
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
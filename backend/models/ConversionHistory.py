@@ -13,7 +13,7 @@ class ConversionHistory(db.Model):
     new_bottle_stock = db.Column(db.Float, nullable=False)
     new_tot_stock = db.Column(db.Float, nullable=False)
 
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # relationships
     bottle = db.relationship("Product", foreign_keys=[bottle_id], lazy="joined")
@@ -2,7 +2,7 @@ from .product import Product, DailyStock, DailyClose
 from .sales import Sale
 from .debtors import Debtor, DebtTransaction
 from .reconciliation import Expense, Reconciliation, ReconciliationLine
-from .purchases import Supplier, Purchase
+from .purchases import Supplier, Purchase, SupplierPayment
 from .wholesale import WholesaleClient, WholesaleSale
 from .waiter import Waiter, WaiterBill
 from .user import User
@@ -11,13 +11,17 @@ from .ConversionHistory import ConversionHistory
 from .cashmovements import CashMovement
 from .purchase_undo import PurchaseUndoLog
 from .purchase_offer import PurchaseOffer
+from .cash_ledger import CashLedgerDay, CashFlowCategory
+from .sales_fact import DailySalesFact
+from .period_close import PeriodClose
+from .cost_layer import CostLayer
 
 __all__ = [
     "Product", "DailyStock", "DailyClose",
     "Sale",
     "Debtor", "DebtTransaction",
     "Expense", "Reconciliation", "ReconciliationLine",
-    "Supplier", "Purchase",
+    "Supplier", "Purchase", "SupplierPayment",
     "WholesaleClient", "WholesaleSale",
     "Waiter", "WaiterBill",
     "User",
@@ -25,5 +29,8 @@ __all__ = [
     "ConversionHistory",
     "CashMovement", "PurchaseUndoLog",
     "PurchaseOffer",
+    "CashLedgerDay", "CashFlowCategory",
+    "DailySalesFact", "PeriodClose",
+    "CostLayer",
 ]
 
@@ -0,0 +1,60 @@
+from ..extensions import db
+
+
+class CashLedgerDay(db.Model):
+    """
+    Daily rollup of CashMovement rows, one row per (date, category, type).
+    Kept in step with cash_movements by utils.cash_ledger so balances are a
+    SUM over days instead of a scan of every movement.
+    """
+    __tablename__ = "cash_ledger_daily"
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    type = db.Column(db.String(10), nullable=False)    # "inflow" or "outflow"
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    movement_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint("date", "category", "type", name="uq_cash_ledger_daily_key"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "date": self.date.isoformat(),
+            "category": self.category,
+            "type": self.type,
+            "amount": float(self.amount),
+            "movement_count": self.movement_count,
+        }
+
+
+# Seeded into cash_flow_category on migration / first run
+DEFAULT_CASH_FLOW_SECTIONS = {
+    "sales": "operating",
+    "expense": "operating",
+    "supplier": "operating",
+    "asset": "investing",
+    "loan": "financing",
+    "owner": "financing",
+}
+
+CASH_FLOW_SECTIONS = ("operating", "investing", "financing")
+
+
+class CashFlowCategory(db.Model):
+    """Maps a CashMovement.category to its cash flow statement section."""
+    __tablename__ = "cash_flow_category"
+
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), unique=True, nullable=False)
+    section = db.Column(db.String(20), nullable=False)  # operating | investing | financing
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "category": self.category,
+            "section": self.section,
+        }
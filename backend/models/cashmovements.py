@@ -14,6 +14,10 @@ class CashMovement(db.Model):
     reference = db.Column(db.String(100))              # optional: transaction ID, invoice ref, etc.
     recorded_by = db.Column(db.String(50))             # user who recorded this movement
 
+    __table_args__ = (
+        db.Index("ix_cash_movements_date_type", "date", "type"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,51 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class CostLayer(db.Model):
+    """
+    One receipt of stock at a unit cost, kept current by utils.cost_layers.
+    Receipts (purchases, free offers, stock-ins, conversions, returns) add a
+    layer; sales, closes and write-offs consume the oldest open layers
+    first and store what they consumed as the realized cost. Inventory at
+    cost is the sum of remaining * unit_cost over open layers.
+
+    With INVENTORY_COST_METHOD=average every receipt re-costs the product's
+    open layers to the blended average, so consumption costs the average.
+    """
+    __tablename__ = "cost_layer"
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id", ondelete="CASCADE"), nullable=False)
+
+    # purchase | offer | stock_in | conversion | return | opening
+    source = db.Column(db.String(20), nullable=False)
+    purchase_id = db.Column(db.Integer, db.ForeignKey("purchase.id", ondelete="SET NULL"), nullable=True)
+
+    quantity = db.Column(db.Integer, nullable=False)
+    remaining = db.Column(db.Integer, nullable=False)
+    unit_cost = db.Column(db.Float, nullable=False)
+
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Open layers of a product in consumption order
+        db.Index(
+            "ix_cost_layer_open",
+            "product_id", "received_at", "id",
+            postgresql_where=db.text("remaining > 0"),
+        ),
+        db.Index("ix_cost_layer_purchase", "purchase_id"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "source": self.source,
+            "purchase_id": self.purchase_id,
+            "quantity": self.quantity,
+            "remaining": self.remaining,
+            "unit_cost": float(self.unit_cost),
+            "received_at": self.received_at.isoformat(),
+        }
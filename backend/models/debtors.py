@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from ..extensions import db
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 class Debtor(db.Model):
@@ -17,9 +18,16 @@ class Debtor(db.Model):
         cascade="all, delete-orphan"
     )
 
-    @property
+    # Running balance, maintained by utils.debt_ledger on every debt/payment
+    total_outstanding = db.Column(db.Float, nullable=False, default=0.0)
+
+    @hybrid_property
     def total_debt(self):
-        return float(sum(t.outstanding_amount for t in self.transactions))
+        return float(self.total_outstanding or 0)
+
+    @total_debt.expression
+    def total_debt(cls):
+        return cls.total_outstanding
 
     def to_dict(self):
         return {
@@ -54,13 +62,19 @@ class DebtTransaction(db.Model):
         cascade="all, delete-orphan"
     )
 
-    @property
-    def paid_amount(self):
-        return float(sum(p.amount for p in self.payments))
+    # Running balances, maintained by utils.debt_ledger on every payment
+    paid_amount = db.Column(db.Float, nullable=False, default=0.0)
+    outstanding_amount = db.Column(
+        db.Float,
+        nullable=False,
+        default=lambda ctx: ctx.get_current_parameters()["amount"]
+    )
 
-    @property
-    def outstanding_amount(self):
-        return float(self.amount - self.paid_amount)
+    __table_args__ = (
+        db.Index("ix_debt_transaction_due_outstanding", "due_date", "outstanding_amount"),
+        db.Index("ix_debt_transaction_debtor_date", "debtor_id", "date"),
+        db.Index("ix_debt_transaction_date", "date"),
+    )
 
     @property
     def is_paid(self):
@@ -71,8 +85,8 @@ class DebtTransaction(db.Model):
             "id": self.id,
             "debtor_id": self.debtor_id,
             "amount": float(self.amount),
-            "paid_amount": self.paid_amount,
-            "outstanding_amount": self.outstanding_amount,
+            "paid_amount": float(self.paid_amount),
+            "outstanding_amount": float(self.outstanding_amount),
             "is_paid": self.is_paid,
             "description": self.description,
             "issued_by": self.issued_by,
@@ -89,13 +103,14 @@ class DebtPayment(db.Model):
     transaction_id = db.Column(
         db.Integer,
         db.ForeignKey("debt_transaction.id"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     amount = db.Column(db.Float, nullable=False)
     received_by = db.Column(db.String(80))
 
-    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     def to_dict(self):
         return {
@@ -104,4 +119,34 @@ class DebtPayment(db.Model):
             "amount": float(self.amount),
             "received_by": self.received_by,
             "date": self.date.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+def debtor_totals_subquery():
+    """
+    One row per debtor with paid / outstanding / total debt recomputed from
+    DebtPayment rows. The stored balances are the fast path; this is the
+    source of truth used by the consistency checker.
+    """
+    paid = (
+        select(
+            DebtPayment.transaction_id,
+            func.sum(DebtPayment.amount).label("paid"),
+        )
+        .group_by(DebtPayment.transaction_id)
+        .subquery()
+    )
+
+    paid_amount = func.coalesce(paid.c.paid, 0)
+
+    return (
+        select(
+            DebtTransaction.debtor_id,
+            func.sum(DebtTransaction.amount).label("total_amount"),
+            func.sum(paid_amount).label("paid_amount"),
+            func.sum(DebtTransaction.amount - paid_amount).label("total_debt"),
+        )
+        .outerjoin(paid, paid.c.transaction_id == DebtTransaction.id)
+        .group_by(DebtTransaction.debtor_id)
+        .subquery()
+    )
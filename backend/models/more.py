@@ -10,6 +10,11 @@ class FixedAsset(db.Model):
     salvage_value = db.Column(db.Float, default=0)
 
     # annual depreciation = (cost – salvage) / useful life
+    def annual_depreciation(self):
+        if not self.useful_life_years:
+            return 0
+        return (self.cost - (self.salvage_value or 0)) / self.useful_life_years
+
     def accumulated_depreciation(self):
         years_passed = max((date.today() - self.purchase_date).days // 365, 0)
         years_passed = min(years_passed, self.useful_life_years)  # avoid negative BV
@@ -0,0 +1,50 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class PeriodClose(db.Model):
+    """
+    Month-end snapshot written when a period is closed. The balance sheet as
+    of any date is the latest snapshot on or before it plus the movements
+    since (services.period_close), so it never scans more than the open
+    period.
+
+    retained_earnings, total_sales, total_cogs and total_expenses are
+    cumulative through period_end, before the bad debt provision (which is
+    re-estimated on the live debt book each time).
+    """
+    __tablename__ = "period_close"
+
+    id = db.Column(db.Integer, primary_key=True)
+    period_end = db.Column(db.Date, nullable=False, unique=True)
+
+    total_sales = db.Column(db.Float, nullable=False, default=0.0)
+    total_cogs = db.Column(db.Float, nullable=False, default=0.0)
+    total_expenses = db.Column(db.Float, nullable=False, default=0.0)
+    retained_earnings = db.Column(db.Float, nullable=False, default=0.0)
+
+    cash = db.Column(db.Float, nullable=False, default=0.0)
+    receivables = db.Column(db.Float, nullable=False, default=0.0)
+    payables = db.Column(db.Float, nullable=False, default=0.0)
+    inventory_value = db.Column(db.Float, nullable=False, default=0.0)
+    fixed_assets = db.Column(db.Float, nullable=False, default=0.0)
+
+    closed_by = db.Column(db.String(50))
+    closed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "period_end": self.period_end.isoformat(),
+            "total_sales": float(self.total_sales),
+            "total_cogs": float(self.total_cogs),
+            "total_expenses": float(self.total_expenses),
+            "retained_earnings": float(self.retained_earnings),
+            "cash": float(self.cash),
+            "receivables": float(self.receivables),
+            "payables": float(self.payables),
+            "inventory_value": float(self.inventory_value),
+            "fixed_assets": float(self.fixed_assets),
+            "closed_by": self.closed_by,
+            "closed_at": self.closed_at.isoformat() if self.closed_at else None,
+        }
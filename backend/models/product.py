@@ -13,15 +13,21 @@ class Product(db.Model):
         cascade="all, delete-orphan"
     )
 
-    def to_dict(self):
-        return {
+    FIELDS = ("id", "name", "stock", "unit_price", "cost_price", "offers")
+
+    def to_dict(self, fields=None):
+        """fields limits the keys returned; offers are only loaded when included."""
+        fields = fields or self.FIELDS
+        data = {
             "id": self.id,
             "name": self.name,
             "stock": self.stock,
             "unit_price": float(self.unit_price),
             "cost_price": float(self.cost_price),
-            "offers": [offer.to_dict() for offer in self.offers]
         }
+        if "offers" in fields:
+            data["offers"] = [offer.to_dict() for offer in self.offers]
+        return {key: data[key] for key in fields}
 
 
 class DailyStock(db.Model):
@@ -44,6 +50,11 @@ class DailyClose(db.Model):
     processed_by = db.Column(db.String(100), nullable=False)
     product = db.relationship("Product", backref="daily_closes")
 
+    __table_args__ = (
+        db.Index("ix_daily_close_date", "date"),
+        db.Index("ix_daily_close_product_date", "product_id", "date"),
+    )
+
 class DailyCloseAdjustment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     daily_close_id = db.Column(db.Integer, db.ForeignKey("daily_close.id"), nullable=False)
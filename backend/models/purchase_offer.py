@@ -27,4 +27,14 @@ class PurchaseOffer(db.Model):
 
     # ✅ Correct relationship
     product = db.relationship("Product", back_populates="offers")
-    purchase = db.relationship("Purchase", back_populates="offers")
\ No newline at end of file
+    purchase = db.relationship("Purchase", back_populates="offers")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "purchase_id": self.purchase_id,
+            "product_id": self.product_id,
+            "quantity": self.quantity,
+            "offer_date": self.offer_date.isoformat() if self.offer_date else None,
+            "created_by": self.created_by,
+        }
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import func, select
 from ..extensions import db
 
 class Supplier(db.Model):
@@ -10,9 +11,11 @@ class Supplier(db.Model):
 
     purchases = db.relationship("Purchase", backref="supplier", lazy=True)
 
-    total_amount_owed = db.Column(db.Float, default=0)
-    total_amount_paid = db.Column(db.Float, default=0)
-    status = db.Column(db.String(50), default="unpaid")
+    # Running balances, maintained by utils.supplier_ledger on every
+    # purchase (invoice), undo and payment
+    total_amount_owed = db.Column(db.Float, nullable=False, default=0.0)   # invoiced
+    total_amount_paid = db.Column(db.Float, nullable=False, default=0.0)
+    status = db.Column(db.String(50), default="paid")  # unpaid | partial | paid
 
     def remaining_balance(self):
         return self.total_amount_owed - self.total_amount_paid
@@ -46,6 +49,12 @@ class Purchase(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        db.Index("ix_purchase_purchase_date", "purchase_date"),
+        db.Index("ix_purchase_supplier_date", "supplier_id", "purchase_date"),
+        db.Index("ix_purchase_product_date", "product_id", "purchase_date"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -59,3 +68,59 @@ class Purchase(db.Model):
         }
 
         
+
+
+class SupplierPayment(db.Model):
+    __tablename__ = "supplier_payment"
+
+    id = db.Column(db.Integer, primary_key=True)
+    supplier_id = db.Column(db.Integer, db.ForeignKey("supplier.id"), nullable=False)
+
+    amount = db.Column(db.Float, nullable=False)
+    reference = db.Column(db.String(120))
+    paid_by = db.Column(db.String(80))
+
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index("ix_supplier_payment_supplier_date", "supplier_id", "date"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "supplier_id": self.supplier_id,
+            "amount": float(self.amount),
+            "reference": self.reference,
+            "paid_by": self.paid_by,
+            "date": self.date.isoformat(),
+        }
+
+
+def supplier_totals_subquery():
+    """
+    One row per supplier with invoiced / paid totals recomputed from Purchase
+    and SupplierPayment rows. The stored balances are the fast path; this is
+    the source of truth used by the consistency checker.
+    """
+    invoiced = (
+        select(Purchase.supplier_id, func.sum(Purchase.total_cost).label("invoiced"))
+        .group_by(Purchase.supplier_id)
+        .subquery()
+    )
+    paid = (
+        select(SupplierPayment.supplier_id, func.sum(SupplierPayment.amount).label("paid"))
+        .group_by(SupplierPayment.supplier_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Supplier.id.label("supplier_id"),
+            func.coalesce(invoiced.c.invoiced, 0).label("invoiced"),
+            func.coalesce(paid.c.paid, 0).label("paid"),
+        )
+        .outerjoin(invoiced, invoiced.c.supplier_id == Supplier.id)
+        .outerjoin(paid, paid.c.supplier_id == Supplier.id)
+        .subquery()
+    )
@@ -6,12 +6,16 @@ class Expense(db.Model):
     __tablename__ = "expense"
     id = db.Column(db.Integer, primary_key=True)
     created_by = db.Column(db.Integer, nullable=True)   # optional user id
-    date = db.Column(db.Date, default=datetime.utcnow().date)
+    date = db.Column(db.Date, default=lambda: datetime.utcnow().date())
     category = db.Column(db.String(120), nullable=True)
     description = db.Column(db.String(300), nullable=True)
     amount = db.Column(db.Float, nullable=False, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_expense_date", "date"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -33,13 +37,18 @@ class Reconciliation(db.Model):
     mpesa3 = db.Column(db.Float, default=0.0)
     cash_on_hand = db.Column(db.Float, default=0.0)
     notes = db.Column(db.String(500), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_locked = db.Column(db.Boolean, default=True)    
 
     lines = db.relationship("ReconciliationLine", backref="reconciliation", cascade="all, delete-orphan")
 
-    def to_dict(self):
-        return {
+    # Matches the /history keyset order
+    __table_args__ = (
+        db.Index("ix_reconciliation_date_created_id", "date", "created_at", "id"),
+    )
+
+    def to_dict(self, include_lines=True):
+        data = {
             "id": self.id,
             "date": self.date.isoformat(),
             "created_by": self.created_by,
@@ -50,13 +59,17 @@ class Reconciliation(db.Model):
             "notes": self.notes,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "is_locked": self.is_locked,
-            "lines": [l.to_dict() for l in self.lines],
         }
 
+        if include_lines:
+            data["lines"] = [l.to_dict() for l in self.lines]
+
+        return data
+
 class ReconciliationLine(db.Model):
     __tablename__ = "reconciliation_line"
     id = db.Column(db.Integer, primary_key=True)
-    reconciliation_id = db.Column(db.Integer, db.ForeignKey("reconciliation.id"), nullable=False)
+    reconciliation_id = db.Column(db.Integer, db.ForeignKey("reconciliation.id"), nullable=False, index=True)
     kind = db.Column(db.String(32), nullable=False)  # 'sale' | 'expense' | 'other'
     description = db.Column(db.String(300))
     amount = db.Column(db.Float, nullable=False)
@@ -2,8 +2,6 @@
 
 from datetime import datetime
 from ..extensions import db
-from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import select, func
 
 class Sale(db.Model):
     __tablename__ = "sale"
@@ -32,63 +30,32 @@ class Sale(db.Model):
         lazy=True
     )
 
+    __table_args__ = (
+        db.Index("ix_sale_date", "date"),
+        db.Index("ix_sale_product_date", "product_id", "date"),
+    )
+
     # =============================
-    # Computed Financial Values
+    # Adjusted Financial Values
     # =============================
+    # Original totals plus every non-voided SaleAdjustment, stored on the row
+    # and kept current by services.sales_service (apply / void adjustment).
 
-    @hybrid_property
-    def adjusted_total_price(self):
-        return self.total_price + sum(
-            a.price_delta for a in self.adjustments if not a.is_voided
-        )
-
-    @adjusted_total_price.expression
-    def adjusted_total_price(cls):
-        return cls.total_price + (
-            select(func.coalesce(func.sum(SaleAdjustment.price_delta), 0))
-            .where(
-                (SaleAdjustment.sale_id == cls.id) &
-                (SaleAdjustment.is_voided == False)
-            )
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-    @hybrid_property
-    def adjusted_total_cost(self):
-        return self.total_cost + sum(
-            a.cost_delta for a in self.adjustments if not a.is_voided
-        )
-
-    @adjusted_total_cost.expression
-    def adjusted_total_cost(cls):
-        return cls.total_cost + (
-            select(func.coalesce(func.sum(SaleAdjustment.cost_delta), 0))
-            .where(
-                (SaleAdjustment.sale_id == cls.id) &
-                (SaleAdjustment.is_voided.is_(False))
-            )
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-    @hybrid_property
-    def adjusted_quantity(self):
-        return self.quantity + sum(
-            a.quantity_delta for a in self.adjustments if not a.is_voided
-        )
-
-    @adjusted_quantity.expression
-    def adjusted_quantity(cls):
-        return cls.quantity + (
-            select(func.coalesce(func.sum(SaleAdjustment.quantity_delta), 0))
-            .where(
-                (SaleAdjustment.sale_id == cls.id) &
-                (SaleAdjustment.is_voided.is_(False))
-            )
-            .correlate(cls)
-            .scalar_subquery()
-        )
+    adjusted_quantity = db.Column(
+        db.Integer,
+        nullable=False,
+        default=lambda ctx: ctx.get_current_parameters()["quantity"]
+    )
+    adjusted_total_price = db.Column(
+        db.Float,
+        nullable=False,
+        default=lambda ctx: ctx.get_current_parameters()["total_price"]
+    )
+    adjusted_total_cost = db.Column(
+        db.Float,
+        nullable=False,
+        default=lambda ctx: ctx.get_current_parameters()["total_cost"]
+    )
 
     def to_dict(self):
         return {
@@ -131,6 +98,10 @@ class SaleAdjustment(db.Model):
 
     is_voided = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index("ix_sale_adjustments_sale_voided", "sale_id", "is_voided"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,40 @@
+from ..extensions import db
+
+
+class DailySalesFact(db.Model):
+    """
+    Pre-aggregated sales per (date, product_id, source), kept current by
+    utils.sales_fact on every write so range reports read at most one row per
+    product per day.
+
+    source:
+      "sale"  -> POS Sale rows (adjusted totals)
+      "close" -> DailyClose stock counts (incl. closing stock adjustments)
+    """
+    __tablename__ = "daily_sales_fact"
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    source = db.Column(db.String(10), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    profit = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint("date", "product_id", "source", name="uq_daily_sales_fact_key"),
+        db.Index("ix_daily_sales_fact_source_date", "source", "date"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "date": self.date.isoformat(),
+            "product_id": self.product_id,
+            "source": self.source,
+            "units": self.units,
+            "revenue": float(self.revenue),
+            "cost": float(self.cost),
+            "profit": float(self.profit),
+        }
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import func, select, or_
 from ..extensions import db
 
 class Waiter(db.Model):
@@ -11,7 +12,7 @@ class Waiter(db.Model):
     def total_outstanding(self):
         return sum(b.total_amount for b in self.bills if not b.is_settled)
 
-    def to_dict(self, include_bills=False, include_outstanding=False):
+    def to_dict(self, include_bills=False, include_outstanding=False, total_outstanding=None):
         data = {
             "id": self.id,
             "name": self.name,
@@ -23,7 +24,11 @@ class Waiter(db.Model):
             data["bills"] = [b.to_dict() for b in self.bills]
 
         if include_outstanding:
-            data["total_outstanding"] = self.total_outstanding()
+            # total_outstanding can be passed in when it was aggregated in SQL
+            data["total_outstanding"] = (
+                float(total_outstanding) if total_outstanding is not None
+                else self.total_outstanding()
+            )
 
         return data
 
@@ -38,6 +43,10 @@ class WaiterBill(db.Model):
     settled_date = db.Column(db.Date)
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_waiter_bill_waiter_settled", "waiter_id", "is_settled"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -49,3 +58,19 @@ class WaiterBill(db.Model):
             "settled_date": self.settled_date.isoformat() if self.settled_date else None,
             "date": self.date.isoformat(),
         }
+
+
+def waiter_outstanding_subquery():
+    """
+    One row per waiter with the sum of unsettled bills. Join it to Waiter to
+    sort or filter by outstanding across all pages in SQL.
+    """
+    return (
+        select(
+            WaiterBill.waiter_id,
+            func.sum(WaiterBill.total_amount).label("total_outstanding"),
+        )
+        .where(or_(WaiterBill.is_settled.is_(False), WaiterBill.is_settled.is_(None)))
+        .group_by(WaiterBill.waiter_id)
+        .subquery()
+    )
@@ -4,6 +4,8 @@ from ..extensions import db
 from ..models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from ..utils.decorators import role_required
+from ..utils.role_cache import invalidate_user_role
+from ..utils.db_pool import pool_status, pool_metrics
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -38,6 +40,7 @@ def delete_user(user_id):
 
     db.session.delete(user)
     db.session.commit()
+    invalidate_user_role(user_id)
     return jsonify({"msg": f"User '{user.username}' deleted"}), 200
 
 
@@ -60,5 +63,21 @@ def update_user_role(user_id):
 
     user.role = new_role
     db.session.commit()
+    invalidate_user_role(user_id)
 
-    return jsonify({"msg": f"User '{user.username}' role updated to '{new_role}'"}), 200
\ No newline at end of file
+    return jsonify({"msg": f"User '{user.username}' role updated to '{new_role}'"}), 200
+
+
+# ------------------------------
+# Connection pool metrics (this worker)
+# ------------------------------
+@admin_bp.route("/db/pool", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def get_pool_status():
+    status = pool_status(db.engine)
+
+    if request.args.get("reset") in ("1", "true"):
+        pool_metrics.reset()
+
+    return jsonify(status), 200
@@ -3,6 +3,8 @@ from flask import Blueprint, jsonify, request
 from ..models import Product
 from ..models.ConversionHistory import ConversionHistory
 from ..extensions import db
+from ..utils.cost_layers import receive_layer, consume_layers
+from ..services.sales_service import lock_products
 from flask_jwt_extended import jwt_required
 
 conversion_bp = Blueprint("conversion", __name__)
@@ -39,13 +41,22 @@ def convert_to_tots():
     if not tot_product:
         return jsonify({"error": f"Product {tot_name} not found"}), 404
 
+    lock_products([bottle_product.id, tot_product.id])
+    db.session.refresh(bottle_product)
+    db.session.refresh(tot_product)
+
     if bottle_product.stock < 1:
+        db.session.rollback()
         return jsonify({"error": f"Not enough {bottle_product.name} stock. Available: {bottle_product.stock}"}), 400
 
     CONVERSION_RATE = 25
     bottle_product.stock -= 1
     tot_product.stock += CONVERSION_RATE
 
+    # The bottle's cost is spread over its tots
+    bottle_cost = consume_layers(bottle_product, 1)
+    receive_layer(tot_product, CONVERSION_RATE, bottle_cost / CONVERSION_RATE, "conversion")
+
     history = ConversionHistory(
         bottle_id=bottle_product.id,
         tot_id=tot_product.id,
@@ -92,12 +103,19 @@ def undo_conversion():
         return jsonify({"error": "Conversion record not found"}), 404
 
     try:
-        bottle = Product.query.get(conversion.bottle_id)
-        tot = Product.query.get(conversion.tot_id)
+        products = lock_products([conversion.bottle_id, conversion.tot_id])
+        bottle = products[conversion.bottle_id]
+        tot = products[conversion.tot_id]
 
         bottle.stock = conversion.prev_bottle_stock
         tot.stock = conversion.prev_tot_stock
 
+        # The tots go back into one bottle at what they cost
+        bottles = conversion.prev_bottle_stock - conversion.new_bottle_stock
+        tots_cost = consume_layers(tot, conversion.new_tot_stock - conversion.prev_tot_stock)
+        if bottles > 0:
+            receive_layer(bottle, bottles, tots_cost / bottles, "conversion")
+
         db.session.delete(conversion)
         db.session.commit()
 
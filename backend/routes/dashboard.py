@@ -3,8 +3,9 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity
 from ..models.user import User
 from datetime import datetime
-from ..models import DailyClose, Product, Debtor
+from ..models import Product, Debtor
 from ..utils.decorators import role_required
+from ..utils.sales_fact import sales_totals
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -16,15 +17,18 @@ def admin_dashboard():
     today = datetime.utcnow().date()
 
     # Today's summary
-    closes = DailyClose.query.filter(func.date(DailyClose.date) == today).all()
-    today_revenue = sum((c.revenue or 0) for c in closes)
-    today_profit = sum((c.profit or 0) for c in closes)
+    _, today_revenue, _, today_profit = sales_totals("close", today)
 
     # Stock alerts
     low_stock = Product.query.filter(Product.stock < 10).order_by(Product.stock.asc()).limit(10).all()
 
-    # Top debtors
-    top_debtors = sorted(Debtor.query.all(), key=lambda d: d.total_debt, reverse=True)[:10]
+    # Top debtors (stored running balance, sorted and limited in SQL)
+    top_debtors = (
+        Debtor.query
+        .order_by(Debtor.total_outstanding.desc(), Debtor.id.asc())
+        .limit(10)
+        .all()
+    )
 
 
     return jsonify({
@@ -51,9 +55,7 @@ def cashier_dashboard():
 
     # Fetch today's closes processed by this user
     # Today's summary
-    closes = DailyClose.query.filter(func.date(DailyClose.date) == today).all()
-    today_revenue = sum((c.revenue or 0) for c in closes)
-    today_profit = sum((c.profit or 0) for c in closes)
+    _, today_revenue, _, today_profit = sales_totals("close", today)
 
     # Stock alerts
     low_stock = Product.query.filter(Product.stock < 10).order_by(Product.stock.asc()).limit(10).all()
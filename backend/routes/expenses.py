@@ -4,6 +4,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..utils.decorators import role_required
 from ..models.reconciliation import Expense
 from ..extensions import db
+from ..utils.dates import on_day
+from ..utils.period_lock import ensure_period_open
 from datetime import datetime
 
 expenses_bp = Blueprint("expenses_bp", __name__, url_prefix="/api")
@@ -18,7 +20,7 @@ def list_expenses():
     if date_str:
         try:
             d = datetime.strptime(date_str, "%Y-%m-%d").date()
-            q = q.filter(Expense.date == d)
+            q = q.filter(on_day(Expense.date, d))
         except ValueError:
             return jsonify({"error": "Invalid date format, use YYYY-MM-DD"}), 400
     q = q.order_by(Expense.date.desc(), Expense.created_at.desc())
@@ -72,6 +74,7 @@ def create_expense():
 def update_expense(expense_id):
     exp = Expense.query.get_or_404(expense_id)
     data = request.get_json() or {}
+    ensure_period_open(exp.date)
     if "amount" in data:
         try:
             exp.amount = float(data["amount"])
@@ -84,6 +87,7 @@ def update_expense(expense_id):
             exp.date = datetime.strptime(data["date"], "%Y-%m-%d").date()
         except:
             return jsonify({"error": "Invalid date format"}), 400
+        ensure_period_open(exp.date)
     db.session.commit()
     return jsonify({"message": "Expense updated", "expense": exp.to_dict()}), 200
 
@@ -92,6 +96,7 @@ def update_expense(expense_id):
 @role_required("admin", "cashier")
 def delete_expense(expense_id):
     exp = Expense.query.get_or_404(expense_id)
+    ensure_period_open(exp.date)
     db.session.delete(exp)
     db.session.commit()
     return jsonify({"message": "Expense deleted"}), 200
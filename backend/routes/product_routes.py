@@ -1,13 +1,50 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import selectinload
 from ..models import Product
 from ..extensions import db
+from ..utils.report_cache import current_data_version
+from ..utils.cost_layers import receive_layer, consume_layers
+from ..services.sales_service import lock_products
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route("/products", methods=["GET"])
 def get_products():
-    products = Product.query.order_by(Product.id).all()
-    return jsonify([p.to_dict() for p in products]), 200
+    """
+    Product catalogue. ?fields=id,name,unit_price,stock limits the keys
+    returned. Tagged with the data version (bumped by any product, stock,
+    price or offer change), so an unchanged poll costs one query and a 304.
+    """
+    try:
+        fields = _product_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    etag = f"products-v{current_data_version()}-{'.'.join(fields)}"
+    if request.if_none_match.contains(etag):
+        response = jsonify()
+        response.status_code = 304
+    else:
+        query = Product.query.order_by(Product.id)
+        if "offers" in fields:
+            query = query.options(selectinload(Product.offers))
+        response = jsonify([p.to_dict(fields) for p in query.all()])
+
+    response.set_etag(etag)
+    # Browsers keep the body but revalidate on every poll
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _product_fields(spec):
+    if not spec:
+        return Product.FIELDS
+
+    fields = tuple(dict.fromkeys(f.strip() for f in spec.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in Product.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(Product.FIELDS)})")
+    return fields or Product.FIELDS
 
 @products_bp.route("/products", methods=["POST"])
 def add_product():
@@ -26,6 +63,8 @@ def add_product():
         cost_price=float(data.get("cost_price", 0.0))
     )
     db.session.add(product)
+    db.session.flush()
+    receive_layer(product, product.stock, product.cost_price, "opening", layers={})
     db.session.commit()
     return jsonify({"message": "Product added successfully", "product": product.to_dict()}), 201
 
@@ -37,16 +76,23 @@ def stock_in():
     if not all([product_id, quantity]):
         return jsonify({"error": "product_id and quantity required"}), 400
 
-    product = Product.query.get(product_id)
-    if not product:
-        return jsonify({"error": "Product not found"}), 404
-
     try:
         q = int(quantity)
     except ValueError:
         return jsonify({"error": "quantity must be integer"}), 400
 
+    lock_products([product_id])  # held until commit; layers are per product
+    product = Product.query.get(product_id)
+    if not product:
+        db.session.rollback()
+        return jsonify({"error": "Product not found"}), 404
+
+    # Untracked stock comes in at the current cost price
     product.stock += q
+    if q > 0:
+        receive_layer(product, q, product.cost_price, "stock_in")
+    else:
+        consume_layers(product, -q)
     db.session.commit()
     return jsonify({"message": f"Added {q} units to {product.name}", "product": product.to_dict()}), 200
 
@@ -1,8 +1,13 @@
+import base64
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-from ..models import Product, Supplier, Purchase
+from datetime import datetime, timedelta
+from ..models import Product, Supplier, Purchase, PurchaseOffer, SupplierPayment
 from ..models.purchase_undo import PurchaseUndoLog
+from ..services.sales_service import lock_products
+from ..utils.supplier_ledger import post_supplier_invoices, record_supplier_payment, aged_payables
+from ..utils.cost_layers import load_open_layers, receive_layer, consume_layers
+from ..utils.period_lock import closed_through
 from ..utils.decorators import role_required
 from ..extensions import db
 from flask_cors import cross_origin
@@ -67,6 +72,156 @@ def delete_supplier(id):
     return jsonify({"message": "Supplier deleted successfully"}), 200
 
 
+# ----------------------------------------------------------------
+# ✅ ACCOUNTS PAYABLE
+# ----------------------------------------------------------------
+@purchases_bp.route("/suppliers/<int:id>/payments", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def pay_supplier(id):
+    """Body: {"amount": 500.0, "reference"?: "MPESA QX12..."}. Also a cash outflow."""
+    supplier = db.session.get(Supplier, id)
+    if not supplier:
+        return jsonify({"error": "Supplier not found"}), 404
+
+    data = request.get_json() or {}
+    try:
+        amount = float(data.get("amount"))
+    except (ValueError, TypeError):
+        return jsonify({"error": "amount must be a number"}), 400
+    if amount <= 0:
+        return jsonify({"error": "Amount must be greater than 0"}), 400
+
+    try:
+        payment = record_supplier_payment(
+            supplier.id, amount, reference=data.get("reference"), paid_by=get_jwt_identity()
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    db.session.commit()
+    db.session.refresh(supplier)
+
+    return jsonify({
+        "message": "Payment recorded",
+        "payment": payment.to_dict(),
+        "supplier": supplier.to_dict(),
+    }), 201
+
+
+@purchases_bp.route("/suppliers/<int:id>/ledger", methods=["GET"])
+@jwt_required()
+@role_required("cashier", "admin")
+def supplier_ledger(id):
+    """
+    Invoices (purchases) and payments for one supplier, oldest first, with a
+    running balance. ?start_date&end_date=YYYY-MM-DD; the opening balance
+    covers everything before start_date.
+    """
+    supplier = db.session.get(Supplier, id)
+    if not supplier:
+        return jsonify({"error": "Supplier not found"}), 404
+
+    try:
+        start = request.args.get("start_date")
+        end = request.args.get("end_date")
+        start = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    def window(column):
+        clauses = [column >= start] if start else []
+        if end:
+            clauses.append(column < end)
+        return clauses
+
+    opening = 0.0
+    if start:
+        invoiced = (
+            db.session.query(db.func.coalesce(db.func.sum(Purchase.total_cost), 0))
+            .filter(Purchase.supplier_id == id, Purchase.purchase_date < start)
+            .scalar()
+        )
+        paid = (
+            db.session.query(db.func.coalesce(db.func.sum(SupplierPayment.amount), 0))
+            .filter(SupplierPayment.supplier_id == id, SupplierPayment.date < start)
+            .scalar()
+        )
+        opening = float(invoiced) - float(paid)
+
+    invoices = (
+        Purchase.query
+        .filter(Purchase.supplier_id == id, *window(Purchase.purchase_date))
+        .all()
+    )
+    payments = (
+        SupplierPayment.query
+        .filter(SupplierPayment.supplier_id == id, *window(SupplierPayment.date))
+        .all()
+    )
+
+    entries = [
+        (p.purchase_date, 0, p.id, {"type": "invoice", "purchase_id": p.id,
+                                    "product_id": p.product_id, "quantity": p.quantity,
+                                    "amount": float(p.total_cost)})
+        for p in invoices
+    ] + [
+        (p.date, 1, p.id, {"type": "payment", "payment_id": p.id,
+                           "reference": p.reference, "amount": -float(p.amount)})
+        for p in payments
+    ]
+    entries.sort(key=lambda e: e[:3])
+
+    balance = opening
+    ledger = []
+    for when, _, _, entry in entries:
+        balance += entry["amount"]
+        ledger.append({**entry, "date": when.isoformat(), "balance": round(balance, 2)})
+
+    return jsonify({
+        "supplier": supplier.to_dict(),
+        "opening_balance": round(opening, 2),
+        "closing_balance": round(balance, 2),
+        "entries": ledger,
+    }), 200
+
+
+@purchases_bp.route("/suppliers/payables/aged", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def aged_payables_report():
+    """Unpaid supplier invoices by age (0-30, 31-60, 61-90, 90+ days). ?as_of=YYYY-MM-DD"""
+    as_of = request.args.get("as_of")
+    try:
+        as_of = datetime.strptime(as_of, "%Y-%m-%d").date() if as_of else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"error": "Invalid as_of format. Use YYYY-MM-DD"}), 400
+
+    suppliers, totals = aged_payables(as_of)
+
+    return jsonify({
+        "as_of": as_of.isoformat(),
+        "suppliers": suppliers,
+        "totals": totals,
+    }), 200
+
+
+def _pay_on_delivery(supplier_id, amount_paid, user):
+    """Records amount_paid (if any) against the supplier. Raises ValueError."""
+    if not amount_paid:
+        return None
+    try:
+        amount_paid = float(amount_paid)
+    except (ValueError, TypeError):
+        raise ValueError("amount_paid must be a number")
+    if amount_paid < 0:
+        raise ValueError("amount_paid cannot be negative")
+
+    return record_supplier_payment(supplier_id, amount_paid, reference="On delivery", paid_by=user)
+
+
 # ----------------------------------------------------------------
 # ✅ PURCHASE MANAGEMENT
 # ----------------------------------------------------------------
@@ -91,9 +246,11 @@ def add_purchase():
     if not all([supplier_id, product_id]) or quantity <= 0 or cost_price <= 0:
         return jsonify({"error": "Invalid input data"}), 400
 
+    lock_products([product_id])  # held until commit; layers are per product
     product = Product.query.get(product_id)
     supplier = Supplier.query.get(supplier_id)
     if not product or not supplier:
+        db.session.rollback()  # release the row lock
         return jsonify({"error": "Invalid product or supplier"}), 404
 
     total_cost = quantity * cost_price
@@ -113,76 +270,390 @@ def add_purchase():
     product.cost_price = cost_price
 
     db.session.add(purchase)
+    db.session.flush()
+    receive_layer(product, quantity, cost_price, "purchase", purchase.id)
+
+    # The purchase is a supplier invoice; amount_paid settles it on delivery
+    post_supplier_invoices([purchase])
+    try:
+        _pay_on_delivery(supplier.id, data.get("amount_paid"), get_jwt_identity())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
     db.session.commit()
 
     return jsonify({"message": "Purchase recorded successfully"}), 201
 
+@purchases_bp.route("/purchases/grn", methods=["POST"])
+@jwt_required()
+@role_required("cashier", "admin")
+def receive_goods():
+    """
+    Goods received note: one supplier delivery, many lines, one transaction.
+    Body: {"supplier_id": 3, "amount_paid"?: 1000.0, "lines": [{"product_id": 1,
+           "quantity": 24, "cost_price": 95.0, "free_quantity"?: 2}, ...]}
+    free_quantity is recorded as a PurchaseOffer on that line's purchase.
+    The delivery is invoiced to the supplier; amount_paid pays (part of) it.
+    Either every line is received or none is.
+    """
+    data = request.get_json() or {}
+    items = data.get("lines") or []
+    user = get_jwt_identity()
+
+    if not items:
+        return jsonify({"error": "No lines provided"}), 400
+
+    try:
+        supplier = db.session.get(Supplier, int(data.get("supplier_id")))
+    except (ValueError, TypeError):
+        supplier = None
+    if not supplier:
+        return jsonify({"error": "Invalid supplier"}), 404
+
+    lines = []
+    errors = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"line": index, "error": "Each line must be an object"})
+            continue
+        try:
+            product_id = int(item.get("product_id"))
+            quantity = int(item.get("quantity"))
+            cost_price = float(item.get("cost_price"))
+            free_quantity = int(item.get("free_quantity") or 0)
+        except (ValueError, TypeError):
+            errors.append({"line": index, "error": "product_id, quantity and cost_price must be numbers"})
+            continue
+
+        if quantity <= 0 or cost_price <= 0:
+            errors.append({"line": index, "error": "quantity and cost_price must be greater than 0"})
+        elif free_quantity < 0:
+            errors.append({"line": index, "error": "free_quantity cannot be negative"})
+        else:
+            lines.append((index, product_id, quantity, cost_price, free_quantity))
+
+    if errors:
+        return jsonify({"error": "Invalid delivery", "lines": errors}), 400
+
+    # One IN query, rows locked until commit (same order as sales, no deadlocks)
+    products = lock_products(product_id for _, product_id, _, _, _ in lines)
+
+    errors = [
+        {"line": index, "error": f"Product ID {product_id} not found"}
+        for index, product_id, _, _, _ in lines
+        if product_id not in products
+    ]
+    if errors:
+        db.session.rollback()  # release the row locks
+        return jsonify({"error": "Delivery rejected", "lines": errors}), 400
+
+    received_on = datetime.utcnow().date()
+    purchases = []
+
+    for _, product_id, quantity, cost_price, free_quantity in lines:
+        product = products[product_id]
+        product.stock += quantity + free_quantity
+        product.cost_price = cost_price
+
+        purchases.append(Purchase(
+            supplier_id=supplier.id,
+            product_id=product_id,
+            quantity=quantity,
+            unit_cost=cost_price,
+            total_cost=quantity * cost_price,
+            purchase_date=received_on,
+        ))
+
+    # Flushed as one multi-row INSERT ... RETURNING; offers need the ids
+    db.session.add_all(purchases)
+    db.session.flush()
+
+    db.session.add_all([
+        PurchaseOffer(
+            purchase_id=purchase.id,
+            product_id=purchase.product_id,
+            quantity=free_quantity,
+            offer_date=datetime.utcnow(),
+            created_by=user,
+        )
+        for (_, _, _, _, free_quantity), purchase in zip(lines, purchases)
+        if free_quantity
+    ])
+
+    # Cost layers: the paid units at cost, free units at zero
+    layers = load_open_layers(products)
+    for (_, _, _, _, free_quantity), purchase in zip(lines, purchases):
+        product = products[purchase.product_id]
+        receive_layer(product, purchase.quantity, purchase.unit_cost, "purchase", purchase.id, layers)
+        receive_layer(product, free_quantity, 0.0, "offer", purchase.id, layers)
+
+    post_supplier_invoices(purchases)
+    try:
+        _pay_on_delivery(supplier.id, data.get("amount_paid"), user)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    results = [
+        {
+            "line": index,
+            "purchase_id": purchase.id,
+            "product_id": purchase.product_id,
+            "quantity": purchase.quantity,
+            "free_quantity": free_quantity,
+            "total_cost": float(purchase.total_cost),
+            "stock": products[purchase.product_id].stock,
+        }
+        for (index, _, _, _, free_quantity), purchase in zip(lines, purchases)
+    ]
+    total_cost = sum(r["total_cost"] for r in results)
+
+    db.session.commit()
+
+    return jsonify({
+        "message": f"Received {len(results)} lines from {supplier.name}",
+        "supplier_id": supplier.id,
+        "purchases": results,
+        "total_cost": round(total_cost, 2),
+    }), 201
+
 # ----------------------------------------------------------------
 # ✅ PURCHASE REPORT
 # ----------------------------------------------------------------
+REPORT_GROUPS = {
+    "supplier": (Supplier.id, Supplier.name),
+    "product": (Product.id, Product.name),
+}
+
+
 @purchases_bp.route("/purchases/report", methods=["GET"])
 @jwt_required()
 @role_required("cashier", "admin")
 def purchase_report():
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-
-    query = (
+    """
+    Purchases, newest first, keyset-paginated, with totals over the whole
+    filtered range computed in SQL.
+    ?start_date&end_date=YYYY-MM-DD&supplier_id&product_id
+    &group_by=supplier|product   adds per-group totals
+    &limit=100&cursor=<next_cursor>
+    &format=csv|ndjson           streams every matching row instead
+    """
+    try:
+        filters = _purchase_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    group_by = request.args.get("group_by")
+    if group_by and group_by not in REPORT_GROUPS:
+        return jsonify({"error": f"group_by must be one of: {', '.join(REPORT_GROUPS)}"}), 400
+
+    rows_query = (
         db.session.query(
             Purchase.id,
+            Purchase.purchase_date,
             Product.name.label("product_name"),
             Supplier.name.label("supplier_name"),
             Purchase.quantity,
             Purchase.unit_cost,
             Purchase.total_cost,
-            Purchase.purchase_date
         )
         .join(Product, Purchase.product_id == Product.id)
         .join(Supplier, Purchase.supplier_id == Supplier.id)
+        .filter(*filters)
     )
 
-    # ✅ Filter by date range if provided
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(Purchase.purchase_date >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD"}), 400
+    export = request.args.get("format")
+    if export in ("csv", "ndjson"):
+        return _stream_purchases(
+            rows_query.order_by(Purchase.purchase_date.desc(), Purchase.id.desc()), export
+        )
+    if export:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
 
-    if end_date:
+    limit = max(1, min(request.args.get("limit", 100, type=int), 500))
+
+    cursor = request.args.get("cursor")
+    if cursor:
         try:
-            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(Purchase.purchase_date <= end_date)
-        except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD"}), 400
+            c_date, c_id = _decode_report_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Rows strictly after the cursor in (purchase_date, id) DESC order
+        rows_query = rows_query.filter(
+            db.tuple_(Purchase.purchase_date, Purchase.id) < db.tuple_(c_date, c_id)
+        )
+
+    rows = (
+        rows_query
+        .order_by(Purchase.purchase_date.desc(), Purchase.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    count, total_quantity, total_spent = (
+        db.session.query(
+            db.func.count(Purchase.id),
+            db.func.coalesce(db.func.sum(Purchase.quantity), 0),
+            db.func.coalesce(db.func.sum(Purchase.total_cost), 0),
+        )
+        .filter(*filters)
+        .one()
+    )
+
+    report = {
+        "purchases": [_report_row(r) for r in rows],
+        "count": count,
+        "total_quantity": int(total_quantity),
+        "total_spent": round(float(total_spent), 2),
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": _encode_report_cursor(rows[-1]) if has_more else None,
+    }
+
+    if group_by:
+        report["group_by"] = group_by
+        report["groups"] = _purchase_groups(group_by, filters)
+
+    if not count:
+        report["message"] = "No purchases recorded yet"
+
+    return jsonify(report), 200
+
+
+def _purchase_filters(args):
+    filters = []
+
+    try:
+        if args.get("start_date"):
+            start = datetime.strptime(args["start_date"], "%Y-%m-%d").date()
+            filters.append(Purchase.purchase_date >= start)
+        if args.get("end_date"):
+            end = datetime.strptime(args["end_date"], "%Y-%m-%d").date()
+            # purchase_date is a DateTime; include the whole end day
+            filters.append(Purchase.purchase_date < end + timedelta(days=1))
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+    for arg, column in (("supplier_id", Purchase.supplier_id), ("product_id", Purchase.product_id)):
+        if args.get(arg):
+            try:
+                filters.append(column == int(args[arg]))
+            except ValueError:
+                raise ValueError(f"{arg} must be an integer")
 
-    # ✅ Fetch results
-    results = query.order_by(Purchase.purchase_date.desc()).all()
+    return filters
 
-    if not results:
-        return jsonify({"purchases": [], "total_spent": 0, "message": "No purchases recorded yet"}), 200
 
-    report = [
+def _purchase_groups(group_by, filters):
+    key, name = REPORT_GROUPS[group_by]
+    total_cost = db.func.sum(Purchase.total_cost)
+
+    rows = (
+        db.session.query(
+            key.label("id"),
+            name.label("name"),
+            db.func.count(Purchase.id).label("purchases"),
+            db.func.sum(Purchase.quantity).label("quantity"),
+            total_cost.label("total_cost"),
+        )
+        .select_from(Purchase)
+        .join(Product, Purchase.product_id == Product.id)
+        .join(Supplier, Purchase.supplier_id == Supplier.id)
+        .filter(*filters)
+        .group_by(key, name)
+        .order_by(total_cost.desc(), key)
+        .all()
+    )
+
+    return [
         {
-            "id": r.id,
-            "product_name": r.product_name,
-            "supplier_name": r.supplier_name,
-            "quantity": r.quantity,
-            "cost_price": float(r.unit_cost),
-            "total_cost": float(r.total_cost),
-            "purchase_date": r.purchase_date.strftime("%Y-%m-%d"),
+            f"{group_by}_id": r.id,
+            f"{group_by}_name": r.name,
+            "purchases": r.purchases,
+            "quantity": int(r.quantity),
+            "total_cost": round(float(r.total_cost), 2),
         }
-        for r in results
+        for r in rows
     ]
 
-    total_spent = sum(item["total_cost"] for item in report)
-    return jsonify({"purchases": report, "total_spent": total_spent}), 200
+
+def _report_row(r):
+    return {
+        "id": r.id,
+        "product_name": r.product_name,
+        "supplier_name": r.supplier_name,
+        "quantity": r.quantity,
+        "cost_price": float(r.unit_cost),
+        "total_cost": float(r.total_cost),
+        "purchase_date": r.purchase_date.strftime("%Y-%m-%d"),
+    }
+
+
+def _encode_report_cursor(row):
+    raw = f"{row.purchase_date.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_report_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    c_date, c_id = raw.split("|")
+    return datetime.fromisoformat(c_date), int(c_id)
+
+
+def _stream_purchases(rows_query, fmt, chunk_size=500):
+    import csv
+    import json
+    from flask import Response, stream_with_context
+    from io import StringIO
+
+    columns = ["id", "purchase_date", "product_name", "supplier_name", "quantity", "cost_price", "total_cost"]
+
+    def generate():
+        output = StringIO()
+        writer = csv.writer(output)
+        if fmt == "csv":
+            writer.writerow(columns)
+
+        # Server-side cursor: rows arrive in batches, never all at once
+        rows = rows_query.execution_options(stream_results=True, yield_per=chunk_size)
+
+        for i, row in enumerate(rows, start=1):
+            item = _report_row(row)
+            if fmt == "csv":
+                writer.writerow([item[c] for c in columns])
+            else:
+                output.write(json.dumps(item) + "\n")
+            if i % chunk_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+
+        yield output.getvalue()
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=purchases.{fmt}"}
+    )
 
 @purchases_bp.route("/purchases/undo", methods=["POST"])
 @jwt_required()
 @role_required("admin")
 def undo_purchases():
-    data = request.get_json()
+    """
+    Reverses purchases (and any free offers received with them) in one
+    transaction. Purchases are checked in the order given; one that would
+    take its product's stock negative, counting the earlier ones in the
+    same request, or that falls in a closed period, is skipped and reported
+    in errors.
+    """
+    data = request.get_json() or {}
     purchase_ids = data.get("purchase_ids", [])
     reason = data.get("reason", "").strip()
     user = get_jwt_identity()
@@ -196,51 +667,109 @@ def undo_purchases():
     undone = []
     errors = []
 
+    requested = []
     for pid in purchase_ids:
-        purchase = Purchase.query.get(pid)
+        try:
+            pid = int(pid)
+        except (ValueError, TypeError):
+            errors.append(f"Purchase {pid} not found")
+            continue
+        if pid not in requested:
+            requested.append(pid)
+
+    # Free units received with each purchase
+    offered = (
+        db.session.query(
+            PurchaseOffer.purchase_id,
+            db.func.sum(PurchaseOffer.quantity).label("quantity"),
+        )
+        .filter(PurchaseOffer.purchase_id.in_(requested))
+        .group_by(PurchaseOffer.purchase_id)
+        .subquery()
+    )
+
+    # One query: purchases, their products (locked in id order, as in
+    # lock_products) and offer totals. The purchases are locked too: a
+    # concurrent undo of the same purchase waits, and its deleted rows then
+    # drop out of this result (reported as not found)
+    rows = (
+        db.session.query(Purchase, Product, db.func.coalesce(offered.c.quantity, 0))
+        .join(Product, Purchase.product_id == Product.id)
+        .outerjoin(offered, offered.c.purchase_id == Purchase.id)
+        .filter(Purchase.id.in_(requested))
+        .order_by(Product.id, Purchase.id)
+        .with_for_update(of=(Purchase, Product))
+        .all()
+    )
+    found = {purchase.id: (purchase, product, int(free)) for purchase, product, free in rows}
+
+    # Purchases in a closed month are frozen in its payables snapshot
+    closed = closed_through()
 
-        if not purchase:
+    # Stock left per product as each undo is applied, in request order
+    remaining = {}
+    logs = []
+    reversed_purchases = []
+
+    for pid in requested:
+        if pid not in found:
             errors.append(f"Purchase {pid} not found")
             continue
 
-        product = Product.query.get(purchase.product_id)
+        purchase, product, free = found[pid]
+        quantity = purchase.quantity + free
 
-        if not product:
-            errors.append(f"Product for purchase {pid} not found")
+        if closed and purchase.purchase_date.date() <= closed:
+            errors.append(f"Cannot undo purchase {pid}: its period is closed")
             continue
 
+        stock = remaining.get(product.id, product.stock)
+
         # 🔴 SAFETY CHECK: prevent negative stock
-        if product.stock - purchase.quantity < 0:
+        if stock - quantity < 0:
             errors.append(
                 f"Cannot undo purchase {pid}: would make stock negative for {product.name}"
             )
             continue
 
-        try:
-            # Reduce stock
-            product.stock -= purchase.quantity
-
-            # Log the undo
-            db.session.add(
-                PurchaseUndoLog(
-                    purchase_id=purchase.id,
-                    product_id=product.id,
-                    quantity_reversed=purchase.quantity,
-                    total_cost=purchase.total_cost,
-                    reason=reason,
-                    undone_by=user,
-                )
+        remaining[product.id] = stock - quantity
+        reversed_purchases.append(purchase)
+        logs.append({
+            "purchase_id": purchase.id,
+            "product_id": product.id,
+            "quantity_reversed": quantity,
+            "total_cost": purchase.total_cost,
+            "reason": reason,
+            "undone_by": user,
+        })
+        undone.append(pid)
+
+    if undone:
+        products = {product.id: product for _, product, _ in found.values()}
+        for product_id, stock in remaining.items():
+            products[product_id].stock = stock
+
+        # Take the units back off the cost layers, the purchase's own first
+        layers = load_open_layers(products)
+        for purchase in reversed_purchases:
+            free = found[purchase.id][2]
+            consume_layers(
+                products[purchase.product_id], purchase.quantity + free, layers, purchase_id=purchase.id
             )
 
-            # Delete the purchase
-            db.session.delete(purchase)
-
-            undone.append(pid)
-
-        except Exception as e:
+        db.session.execute(db.insert(PurchaseUndoLog), logs)
+        post_supplier_invoices(reversed_purchases, sign=-1)
+        db.session.execute(
+            db.delete(PurchaseOffer).where(PurchaseOffer.purchase_id.in_(undone)),
+            execution_options={"synchronize_session": False},
+        )
+        deleted = db.session.execute(
+            db.delete(Purchase).where(Purchase.id.in_(undone)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if deleted != len(undone):
             db.session.rollback()
-            errors.append(f"Failed to undo {pid}: {str(e)}")
-            continue
+            return jsonify({"error": "Purchases changed while undoing, try again"}), 409
 
     db.session.commit()
 
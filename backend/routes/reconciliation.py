@@ -7,21 +7,24 @@ from ..extensions import db
 from ..models.reconciliation import Reconciliation, ReconciliationLine
 from ..models import DailyClose, Product  # adjust import path if your models are elsewhere
 from ..models import Debtor, DebtTransaction, Waiter, WaiterBill
-from ..models.debtors import DebtPayment
+from ..models.waiter import waiter_outstanding_subquery
 from ..models.cashmovements import CashMovement
 from datetime import datetime, date, timedelta
+from sqlalchemy.orm import selectinload
+import base64
 from ..utils.expense_helpers import record_expense
-# PDF imports
-from flask import send_file
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib import pagesizes
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from io import BytesIO
+from ..utils.cash_ledger import record_cash_movement
+from ..utils.debt_ledger import record_debt, record_debt_payment
+from ..utils.dates import on_day
+from ..utils.sales_fact import sales_totals
+# PDF (rendered off-thread, cached on disk)
+import os
+from flask import send_file, current_app, url_for
+from ..services.recon_report import (
+    reconciliation_report_data, reconciliation_range_data, report_key,
+    report_path, range_report_path, write_report, write_range_report,
+)
+from ..utils.jobs import pdf_jobs
 
 recon_bp = Blueprint("recon_bp", __name__, url_prefix="/api/recon")
 
@@ -50,14 +53,15 @@ def create_reconciliation():
 
         for item in inflows:
             if item["amount"] > 0:
-                db.session.add(CashMovement(
+                record_cash_movement(
                     date=date,
                     source=item["source"],
                     type="inflow",
+                    category="sales",
                     amount=item["amount"],
                     description=f"Recorded from reconciliation ({notes})",
                     recorded_by=user,
-                ))
+                )
 
         # Handle adjustment lines
         for line in lines:
@@ -78,27 +82,27 @@ def create_reconciliation():
                     user_id=user
                 )
             elif kind == "sale":
-                db.session.add(CashMovement(
+                record_cash_movement(
                     date=date,
                     source="Adjustment - Sale",
                     type="inflow",
+                    category="sales",
                     amount=amount,
                     description=desc,
                     recorded_by=user,
-                ))
+                )
             elif kind == "debtor":
                 debtor = Debtor.query.get(related_id)
                 if debtor:
-                    transaction = DebtTransaction(
+                    # Also bumps the debtor's running balance
+                    record_debt(
                         debtor_id=debtor.id,
                         amount=amount,
                         description=desc,
                         issued_by=user,
                         date=datetime.combine(date, datetime.min.time()),
-                        due_date=datetime.combine(date, datetime.min.time()) + timedelta(days=5)
+                        due_days=5
                     )
-
-                    db.session.add(transaction)
             elif kind == "waiter":
                 waiter = Waiter.query.get(related_id)
                 if waiter:
@@ -110,14 +114,15 @@ def create_reconciliation():
                         is_settled=False
                     ))
             else:
-                db.session.add(CashMovement(
+                record_cash_movement(
                     date=date,
                     source="Adjustment - Other",
                     type="inflow",
+                    category="other",
                     amount=amount,
                     description=desc,
                     recorded_by=user,
-                ))
+                )
 
         db.session.commit()
         return jsonify({"message": "Reconciliation saved successfully"}), 201
@@ -139,19 +144,14 @@ def recon_summary():
     except ValueError:
         return jsonify({"error": "invalid date format"}), 400
 
-    # SALES from DailyClose
-    closes = (
-        DailyClose.query
-        .filter(db.func.date(DailyClose.date) == d)
-        .all()
-    )
-    total_sales = sum(c.revenue for c in closes) if closes else 0.0
+    # SALES from DailyClose (pre-aggregated per product per day)
+    _, total_sales, _, _ = sales_totals("close", d)
 
     # EXPENSES from CashMovement (NOT Expense table)
     expenses = (
         CashMovement.query
         .filter(
-            db.func.date(CashMovement.date) == d,
+            on_day(CashMovement.date, d),
             CashMovement.type == "outflow"
         )
         .all()
@@ -176,9 +176,77 @@ def get_recon(recon_id):
 @jwt_required()
 @role_required("admin")
 def recon_history():
-    # admin-only: return existing reconciliations
-    items = Reconciliation.query.order_by(Reconciliation.date.desc(), Reconciliation.created_at.desc()).all()
-    return jsonify([r.to_dict() for r in items]), 200
+    """
+    admin-only: reconciliations, newest first, keyset-paginated.
+    ?limit=50&cursor=<next_cursor>&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&include_lines=false
+    """
+    limit = max(1, min(request.args.get("limit", 50, type=int), 200))
+    include_lines = request.args.get("include_lines", "true").lower() != "false"
+
+    query = Reconciliation.query
+
+    try:
+        start_str = request.args.get("start_date")
+        end_str = request.args.get("end_date")
+        if start_str:
+            query = query.filter(Reconciliation.date >= datetime.strptime(start_str, "%Y-%m-%d").date())
+        if end_str:
+            query = query.filter(Reconciliation.date <= datetime.strptime(end_str, "%Y-%m-%d").date())
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            c_date, c_created_at, c_id = _decode_history_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Rows strictly after the cursor in (date, created_at, id) DESC order
+        query = query.filter(
+            db.tuple_(Reconciliation.date, Reconciliation.created_at, Reconciliation.id)
+            < db.tuple_(c_date, c_created_at, c_id)
+        )
+
+    if include_lines:
+        # One extra IN query for all lines instead of one per reconciliation
+        query = query.options(selectinload(Reconciliation.lines))
+
+    rows = (
+        query
+        .order_by(
+            Reconciliation.date.desc(),
+            Reconciliation.created_at.desc(),
+            Reconciliation.id.desc()
+        )
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return jsonify({
+        "items": [r.to_dict(include_lines=include_lines) for r in rows],
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": _encode_history_cursor(rows[-1]) if has_more else None,
+    }), 200
+
+
+def _encode_history_cursor(recon):
+    raw = f"{recon.date.isoformat()}|{recon.created_at.isoformat()}|{recon.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_history_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    c_date, c_created_at, c_id = raw.split("|")
+    return (
+        date.fromisoformat(c_date),
+        datetime.fromisoformat(c_created_at),
+        int(c_id),
+    )
 
 @recon_bp.route("/waiter/create", methods=["POST"])
 @jwt_required()
@@ -216,58 +284,44 @@ def list_waiters():
     sort = request.args.get("sort")   # outstanding_desc / outstanding_asc
     export = request.args.get("export")  # csv
 
-    query = Waiter.query
+    outstanding = waiter_outstanding_subquery()
+    total_outstanding = db.func.coalesce(outstanding.c.total_outstanding, 0)
+
+    query = (
+        db.session.query(Waiter, total_outstanding)
+        .outerjoin(outstanding, outstanding.c.waiter_id == Waiter.id)
+    )
 
     # FILTER BY STATUS
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Waiter.status == status)
 
     # SEARCH BY NAME
     if search:
         query = query.filter(Waiter.name.ilike(f"%{search}%"))
 
-    # PAGINATE FIRST (SQLAlchemy requires this before sorting in-memory)
-    paginated = query.order_by(Waiter.id.asc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-
-    waiters = [
-        w.to_dict(include_bills=True, include_outstanding=True)
-        for w in paginated.items
-    ]
-
-    # SORT BY OUTSTANDING (in-memory)
+    # SORT BY OUTSTANDING (in SQL, so it holds across pages)
     if sort == "outstanding_desc":
-        waiters = sorted(waiters, key=lambda w: w["total_outstanding"], reverse=True)
+        query = query.order_by(total_outstanding.desc(), Waiter.id.asc())
     elif sort == "outstanding_asc":
-        waiters = sorted(waiters, key=lambda w: w["total_outstanding"])
+        query = query.order_by(total_outstanding.asc(), Waiter.id.asc())
+    else:
+        query = query.order_by(Waiter.id.asc())
 
-    # EXPORT TO CSV
+    # EXPORT TO CSV (every matching waiter, streamed)
     if export == "csv":
-        import csv
-        from flask import Response
-        from io import StringIO
-
-        output = StringIO()
-        writer = csv.writer(output)
+        return _stream_waiters_csv(query.with_entities(
+            Waiter.id, Waiter.name, Waiter.status, Waiter.daily_salary, total_outstanding
+        ))
 
-        writer.writerow(["id", "name", "status", "daily_salary", "total_outstanding"])
+    paginated = query.options(selectinload(Waiter.bills)).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
 
-        for w in waiters:
-            writer.writerow([
-                w["id"],
-                w["name"],
-                w["status"],
-                w["daily_salary"],
-                w["total_outstanding"],
-            ])
-
-        output.seek(0)
-        return Response(
-            output,
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment; filename=waiters.csv"}
-        )
+    waiters = [
+        w.to_dict(include_bills=True, include_outstanding=True, total_outstanding=owed)
+        for w, owed in paginated.items
+    ]
 
     return jsonify({
         "items": waiters,
@@ -279,6 +333,35 @@ def list_waiters():
         "has_prev": paginated.has_prev,
     }), 200
 
+
+def _stream_waiters_csv(rows_query, chunk_size=500):
+    import csv
+    from flask import Response, stream_with_context
+    from io import StringIO
+
+    def generate():
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["id", "name", "status", "daily_salary", "total_outstanding"])
+
+        # Server-side cursor: rows arrive in batches, never all at once
+        rows = rows_query.execution_options(stream_results=True, yield_per=chunk_size)
+
+        for i, row in enumerate(rows, start=1):
+            writer.writerow([row[0], row[1], row[2], row[3], float(row[4])])
+            if i % chunk_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+
+        yield output.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=waiters.csv"}
+    )
+
 @recon_bp.route("/debtor/create", methods=["POST"])
 @jwt_required()
 @role_required("admin")
@@ -307,8 +390,22 @@ def create_debtor():
 @jwt_required()
 @role_required("admin")
 def list_debtors():
-    debtors = Debtor.query.order_by(Debtor.name.asc()).all()
-    return jsonify([d.to_dict() for d in debtors]), 200
+    sort = request.args.get("sort")   # debt_desc / debt_asc
+    limit = request.args.get("limit", type=int)
+
+    query = Debtor.query
+
+    if sort == "debt_desc":
+        query = query.order_by(Debtor.total_outstanding.desc(), Debtor.name.asc())
+    elif sort == "debt_asc":
+        query = query.order_by(Debtor.total_outstanding.asc(), Debtor.name.asc())
+    else:
+        query = query.order_by(Debtor.name.asc())
+
+    if limit:
+        query = query.limit(limit)
+
+    return jsonify([d.to_dict() for d in query.all()]), 200
 
 @recon_bp.route("/debtor/<int:debtor_id>", methods=["GET"])
 @jwt_required()
@@ -337,13 +434,13 @@ def create_payment(transaction_id):
     if amount > transaction.outstanding_amount:
         return jsonify({"error": "Amount exceeds outstanding debt"}), 400
 
-    payment = DebtPayment(
-        transaction_id=transaction.id,
-        amount=amount,
-        received_by=get_jwt_identity()
-    )
+    try:
+        # Updates transaction + debtor balances atomically with the payment
+        record_debt_payment(transaction, amount, received_by=get_jwt_identity())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
 
-    db.session.add(payment)
     db.session.commit()
 
     return jsonify({
@@ -381,126 +478,143 @@ def settle_waiter_bill(bill_id):
 @jwt_required()
 @role_required("admin", "cashier")
 def generate_reconciliation_report(recon_id):
-
     recon = Reconciliation.query.get_or_404(recon_id)
+    data, key, path = _report_file(recon)
 
-    # Get sales
-    closes = (
-        DailyClose.query
-        .filter(db.func.date(DailyClose.date) == recon.date)
-        .all()
-    )
+    if not os.path.exists(path):
+        # Render off-thread; old clients that expect the file get a short wait
+        pdf_jobs.submit(key, write_report, path, data)
+        pdf_jobs.wait(key, current_app.config["PDF_SYNC_WAIT"])
 
-    total_sales = sum(c.revenue for c in closes) if closes else 0.0
+        if not os.path.exists(path):
+            # A download URL: a failed render must not look like a file
+            return _report_status_response(recon, key, path, failed_code=502)
 
-    # Get expenses
-    expenses = (
-        CashMovement.query
-        .filter(
-            db.func.date(CashMovement.date) == recon.date,
-            CashMovement.type == "outflow"
-        )
-        .all()
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f"reconciliation_{recon.date}.pdf",
+        mimetype="application/pdf"
     )
-    total_expenses = sum(e.amount for e in expenses) if expenses else 0.0
-
-    # Totals
-    mpesa_total = recon.mpesa1 + recon.mpesa2 + recon.mpesa3
-    counted_total = mpesa_total + recon.cash_on_hand
 
-    adjustments_total = sum(l.amount for l in recon.lines)
-    expected_cash = total_sales - adjustments_total
-    difference = counted_total - total_sales + adjustments_total
 
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
-    elements = []
-
-    styles = getSampleStyleSheet()
-    title_style = styles["Heading1"]
-    normal_style = styles["Normal"]
-
-    # Title
-    elements.append(Paragraph("RECONCILIATION REPORT", title_style))
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # Basic Info Table
-    info_data = [
-        ["Date", recon.date.isoformat()],
-        ["Created At", recon.created_at.strftime("%Y-%m-%d %H:%M")],
-        ["Recorded By", str(recon.created_by)],
-    ]
+@recon_bp.route("/<int:recon_id>/report/jobs", methods=["POST"])
+@jwt_required()
+@role_required("admin", "cashier")
+def queue_reconciliation_report(recon_id):
+    recon = Reconciliation.query.get_or_404(recon_id)
+    data, key, path = _report_file(recon)
 
-    info_table = Table(info_data, colWidths=[150, 300])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-    ]))
-
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.4 * inch))
-
-    # Financial Summary Table
-    summary_data = [
-        ["Total Sales", f"KSh {total_sales:,.2f}"],
-        ["Total Expenses", f"KSh {total_expenses:,.2f}"],
-        ["Mpesa Total", f"KSh {mpesa_total:,.2f}"],
-        ["Cash on Hand", f"KSh {recon.cash_on_hand:,.2f}"],
-        ["Adjustments Total", f"KSh {adjustments_total:,.2f}"],
-        ["Surplus / Shortfall", f"KSh {difference:,.2f}"],
-    ]
+    if not os.path.exists(path):
+        pdf_jobs.submit(key, write_report, path, data)
 
-    summary_table = Table(summary_data, colWidths=[200, 250])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-    ]))
+    return _report_status_response(recon, key, path)
 
-    elements.append(summary_table)
-    elements.append(Spacer(1, 0.4 * inch))
 
-    # Adjustments Section
-    if recon.lines:
-        elements.append(Paragraph("Adjustments", styles["Heading2"]))
-        elements.append(Spacer(1, 0.2 * inch))
+@recon_bp.route("/<int:recon_id>/report/status", methods=["GET"])
+@jwt_required()
+@role_required("admin", "cashier")
+def reconciliation_report_status(recon_id):
+    recon = Reconciliation.query.get_or_404(recon_id)
+    _, key, path = _report_file(recon)
+    return _report_status_response(recon, key, path)
+
+
+def _report_file(recon):
+    """(report data, content key, cache path) for the reconciliation as it is now."""
+    data = reconciliation_report_data(recon)
+    key = report_key(data)
+    return data, key, report_path(current_app.config["PDF_CACHE_DIR"], recon.id, key)
+
+
+def _report_status_response(recon, key, path, failed_code=200):
+    """
+    ready       -> download_url serves the cached file
+    pending     -> queued or rendering in this worker, poll status_url
+    failed      -> rendering raised (error says why), POST the job again
+                   to retry; a 200 from the job/status endpoints (the
+                   request itself worked), failed_code from the download
+    not_started -> nothing queued here (e.g. another worker), POST the job
+    """
+    if os.path.exists(path):
+        status = "ready"
+    else:
+        status = pdf_jobs.status(key) or "not_started"
+
+    body = {
+        "reconciliation_id": recon.id,
+        "key": key,
+        "status": status,
+        "status_url": url_for("recon_bp.reconciliation_report_status", recon_id=recon.id),
+        "download_url": url_for("recon_bp.generate_reconciliation_report", recon_id=recon.id),
+    }
+
+    if status == "failed":
+        body["error"] = pdf_jobs.error(key)
+        return jsonify(body), failed_code
+
+    return jsonify(body), 200 if status == "ready" else 202
+
+# Month-end audits; longer exports should be split
+RANGE_EXPORT_MAX_DAYS = 93
+
+
+@recon_bp.route("/report/range", methods=["GET"])
+@jwt_required()
+@role_required("admin", "cashier")
+def export_reconciliation_range():
+    """
+    ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&format=pdf|zip
+
+    pdf: one document (summary page + every reconciliation)
+    zip: one PDF per reconciliation
+    Rendered on the PDF job pool and cached on disk by content. Answers 202
+    with a status body while rendering; poll the same URL until it returns
+    the file.
+    """
+    try:
+        start = datetime.strptime(request.args.get("start_date", ""), "%Y-%m-%d").date()
+        end = datetime.strptime(request.args.get("end_date", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "start_date and end_date must be YYYY-MM-DD"}), 400
 
-        lines_data = [["Type", "Description", "Amount"]]
+    fmt = request.args.get("format", "pdf")
+    if fmt not in ("pdf", "zip"):
+        return jsonify({"error": "format must be pdf or zip"}), 400
 
-        for l in recon.lines:
-            lines_data.append([
-                l.kind,
-                l.description or "",
-                f"KSh {l.amount:,.2f}"
-            ])
+    if end < start:
+        return jsonify({"error": "end_date must not be before start_date"}), 400
+    if (end - start).days >= RANGE_EXPORT_MAX_DAYS:
+        return jsonify({"error": f"Range is limited to {RANGE_EXPORT_MAX_DAYS} days"}), 400
 
-        lines_table = Table(lines_data, colWidths=[100, 250, 100])
-        lines_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
+    items = reconciliation_range_data(start, end)
+    if not items:
+        return jsonify({"error": "No reconciliations in range"}), 404
 
-        elements.append(lines_table)
+    cache_dir = current_app.config["PDF_CACHE_DIR"]
+    key = report_key({"format": fmt, "items": items})
+    path = range_report_path(cache_dir, start, end, key, fmt)
 
-    # Notes
-    if recon.notes:
-        elements.append(Spacer(1, 0.4 * inch))
-        elements.append(Paragraph("Notes:", styles["Heading2"]))
-        elements.append(Paragraph(recon.notes, normal_style))
+    if not os.path.exists(path):
+        pdf_jobs.submit(key, write_range_report, path, items, start, end, fmt, cache_dir)
+        pdf_jobs.wait(key, current_app.config["PDF_SYNC_WAIT"])
 
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
+        if not os.path.exists(path):
+            status = pdf_jobs.status(key) or "not_started"
+            body = {"key": key, "status": status, "count": len(items), "status_url": request.full_path}
+            if status == "failed":
+                body["error"] = pdf_jobs.error(key)
+                return jsonify(body), 502
+            return jsonify(body), 202
 
     return send_file(
-        buffer,
+        path,
         as_attachment=True,
-        download_name=f"reconciliation_{recon.date}.pdf",
-        mimetype="application/pdf"
+        download_name=f"reconciliations_{start}_{end}.{fmt}",
+        mimetype="application/zip" if fmt == "zip" else "application/pdf"
     )
 
+
 @recon_bp.route("/<int:recon_id>/reopen", methods=["PUT"])
 @jwt_required()
 @role_required("admin")
@@ -538,7 +652,7 @@ def reconciliation_status():
     # Check if new sales exist
     latest_close = (
         DailyClose.query
-        .filter(db.func.date(DailyClose.date) == recon_date)
+        .filter(on_day(DailyClose.date, recon_date))
         .order_by(DailyClose.date.desc())
         .first()
     )
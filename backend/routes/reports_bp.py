@@ -5,8 +5,16 @@ from ..models import Sale, Expense, Product, Purchase
 from ..utils.decorators import role_required
 from ..extensions import db
 from sqlalchemy import func
-from ..models.cashmovements import CashMovement
 from ..models.more import FixedAsset, AccountsReceivable
+from ..models.cash_ledger import CashFlowCategory, CASH_FLOW_SECTIONS
+from ..utils.cash_ledger import cash_balance, cash_flow_by_section
+from ..utils.sales_fact import sales_totals
+from ..utils.report_cache import report_cache
+from ..services.period_close import (
+    balances_as_of, inventory_value as current_inventory_value, fixed_assets_book_value,
+    close_period, reopen_latest_period,
+)
+from ..models.period_close import PeriodClose
 
 reports_bp = Blueprint("reports_bp", __name__, url_prefix="/api/reports")
 
@@ -50,26 +58,24 @@ def debug_token():
 @reports_bp.route("/profit_loss", methods=["GET","OPTIONS"])
 @jwt_required()
 @role_required("admin")
-def profit_loss_report(): 
+def profit_loss_report():
     start_datetime, end_datetime = parse_dates()
 
-    query_sales = Sale.query.filter(
-        Sale.date >= start_datetime,
-        Sale.date <= end_datetime
+    payload = report_cache.get_or_compute(
+        "profit_loss", start_datetime, end_datetime,
+        lambda: _profit_loss(start_datetime, end_datetime),
     )
+    return jsonify(payload), 200
 
+
+def _profit_loss(start_datetime, end_datetime):
     query_expenses = Expense.query.filter(
         Expense.date >= start_datetime,
         Expense.date <= end_datetime
     )
 
-    total_sales = query_sales.with_entities(db.func.sum(Sale.adjusted_total_price)).scalar() or 0
-
-    total_cogs = query_sales.join(
-        Product, Product.id == Sale.product_id
-    ).with_entities(
-        db.func.sum(Sale.quantity * Product.cost_price)
-    ).scalar() or 0
+    # Sales and cost at time of sale, one fact row per product per day
+    _, total_sales, total_cogs, _ = sales_totals("sale", start_datetime, end_datetime)
 
     total_expenses = query_expenses.with_entities(db.func.sum(Expense.amount)).scalar() or 0
 
@@ -85,14 +91,14 @@ def profit_loss_report():
 
     two_months_ago = end_datetime - timedelta(days=60)
 
-    overdue_transactions = DebtTransaction.query.filter(
-        DebtTransaction.due_date < two_months_ago
-    ).all()
-
-    bad_debt_provision = sum(
-        t.outstanding_amount
-        for t in overdue_transactions
-        if t.outstanding_amount > 0
+    # Single indexed SUM over (due_date, outstanding_amount)
+    bad_debt_provision = (
+        db.session.query(func.coalesce(func.sum(DebtTransaction.outstanding_amount), 0))
+        .filter(
+            DebtTransaction.due_date < two_months_ago,
+            DebtTransaction.outstanding_amount > 0
+        )
+        .scalar()
     )
 
     gross_profit = total_sales - total_cogs
@@ -101,7 +107,7 @@ def profit_loss_report():
     net_profit = gross_profit - total_expenses - bad_debt_provision
 
 
-    return jsonify({
+    return {
         "report_type": "Profit and Loss",
         "period": {"start": str(start_datetime), "end": str(end_datetime)},
         "sections": {
@@ -112,7 +118,7 @@ def profit_loss_report():
             "bad_debt_provision": float(bad_debt_provision),
             "net_profit": float(net_profit)
         }
-    }), 200
+    }
 
 @reports_bp.route("/cash_flow", methods=["GET"])
 @jwt_required()
@@ -121,40 +127,27 @@ def cash_flow_statement():
 
     start_datetime, end_datetime = parse_dates()
 
-    movements = CashMovement.query.filter(
-        CashMovement.date >= start_datetime,
-        CashMovement.date <= end_datetime
-    ).all()
-
-    operating_inflows = 0
-    operating_outflows = 0
-    investing_inflows = 0
-    investing_outflows = 0
-    financing_inflows = 0
-    financing_outflows = 0
-
-    for m in movements:
-
-        if m.category in ["sales", "expense"]:
-
-            if m.type == "inflow":
-                operating_inflows += m.amount
-            else:
-                operating_outflows += m.amount
-
-        elif m.category == "asset":
+    # Movements, opening cash and the section mapping are all fixed once the
+    # range is closed; P&L and balance sheet read the live debt book
+    # (provision), so they stay versioned
+    payload = report_cache.get_or_compute(
+        "cash_flow", start_datetime, end_datetime,
+        lambda: _cash_flow(start_datetime, end_datetime),
+        closed_periods=True,
+    )
+    return jsonify(payload), 200
 
-            if m.type == "inflow":
-                investing_inflows += m.amount
-            else:
-                investing_outflows += m.amount
 
-        elif m.category in ["loan", "owner"]:
+def _cash_flow(start_datetime, end_datetime):
+    # One grouped query: section x (inflows, outflows)
+    sections = cash_flow_by_section(start_datetime, end_datetime)
 
-            if m.type == "inflow":
-                financing_inflows += m.amount
-            else:
-                financing_outflows += m.amount
+    operating_inflows = sections["operating"]["inflows"]
+    operating_outflows = sections["operating"]["outflows"]
+    investing_inflows = sections["investing"]["inflows"]
+    investing_outflows = sections["investing"]["outflows"]
+    financing_inflows = sections["financing"]["inflows"]
+    financing_outflows = sections["financing"]["outflows"]
 
     net_operating = operating_inflows - operating_outflows
     net_investing = investing_inflows - investing_outflows
@@ -162,19 +155,12 @@ def cash_flow_statement():
 
     net_cash_flow = net_operating + net_investing + net_financing
 
-    # Opening cash
-    historical = CashMovement.query.filter(
-        CashMovement.date < start_datetime
-    ).all()
-
-    opening_cash = sum(
-        m.amount if m.type == "inflow" else -m.amount
-        for m in historical
-    )
+    # Opening cash (daily ledger rollup, one row per day/category/type)
+    opening_cash = cash_balance(before=start_datetime)
 
     closing_cash = opening_cash + net_cash_flow
 
-    return jsonify({
+    return {
         "report_type": "Cash Flow",
         "sections": {
             "operating_activities": {
@@ -195,7 +181,50 @@ def cash_flow_statement():
             "net_increase_in_cash": float(net_cash_flow),
             "closing_cash_balance": float(closing_cash),
         }
-    }), 200
+    }
+
+
+@reports_bp.route("/cash_flow/categories", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def list_cash_flow_categories():
+    mappings = CashFlowCategory.query.order_by(CashFlowCategory.category.asc()).all()
+    return jsonify([m.to_dict() for m in mappings]), 200
+
+
+@reports_bp.route("/cash_flow/categories", methods=["PUT"])
+@jwt_required()
+@role_required("admin")
+def set_cash_flow_category():
+    data = request.get_json() or {}
+    category = (data.get("category") or "").strip()
+    section = data.get("section")
+
+    if not category:
+        return jsonify({"error": "category is required"}), 400
+
+    if section not in CASH_FLOW_SECTIONS:
+        return jsonify({"error": f"section must be one of {', '.join(CASH_FLOW_SECTIONS)}"}), 400
+
+    mapping = CashFlowCategory.query.filter_by(category=category).first()
+    if mapping:
+        mapping.section = section
+    else:
+        mapping = CashFlowCategory(category=category, section=section)
+        db.session.add(mapping)
+
+    db.session.commit()
+    return jsonify(mapping.to_dict()), 200
+
+
+@reports_bp.route("/cash_flow/categories/<string:category>", methods=["DELETE"])
+@jwt_required()
+@role_required("admin")
+def delete_cash_flow_category(category):
+    mapping = CashFlowCategory.query.filter_by(category=category).first_or_404()
+    db.session.delete(mapping)
+    db.session.commit()
+    return jsonify({"message": f"Mapping for '{category}' removed"}), 200
 
 
 @reports_bp.route("/balance_sheet", methods=["GET", "OPTIONS"])
@@ -215,55 +244,57 @@ def balance_sheet():
 
     _, end_datetime = parse_dates()
 
+    # Inventory and depreciation are read live, so only the versioned cache
+    payload = report_cache.get_or_compute(
+        "balance_sheet", None, end_datetime,
+        lambda: _balance_sheet(end_datetime),
+    )
+    return jsonify(payload), 200
+
+
+def _balance_sheet(end_datetime):
+    # Last month-end snapshot + movements since (bounded to the open period)
+    balances, snapshot = balances_as_of(end_datetime)
+
     # ============================
     #        ASSETS SECTION
     # ============================
 
-    # Inventory value at cost
-    inventory_value = (
-        db.session.query(db.func.sum(Product.stock * Product.cost_price))
-        .scalar() or 0
-    )
+    # Inventory at cost and fixed assets: the snapshot's valuation when the
+    # balance sheet is for a closed month end, otherwise live
+    if snapshot and snapshot.period_end == end_datetime.date():
+        inventory_value = snapshot.inventory_value
+        total_fixed_assets = snapshot.fixed_assets
+    else:
+        inventory_value = current_inventory_value()
+        total_fixed_assets = fixed_assets_book_value()
 
     # Cash
-    movements = CashMovement.query.filter(
-        CashMovement.date <= end_datetime
-    ).all()
-
-    cash_balance = sum(
-        m.amount if m.type == "inflow" else -m.amount
-        for m in movements
-    )
+    cash_on_hand = balances["cash"]
 
      # Receivables
     from ..models.debtors import DebtTransaction
     from datetime import timedelta
 
-    all_transactions = DebtTransaction.query.filter(
-        DebtTransaction.date <= end_datetime
-    ).all()
-
-    gross_receivables = sum(
-        t.outstanding_amount for t in all_transactions
-    )
+    gross_receivables = balances["receivables"]
 
     # Automatic Provision (>60 days)
     two_months_ago = end_datetime - timedelta(days=60)
 
-    provision = sum(
-        t.outstanding_amount
-        for t in all_transactions
-        if t.due_date < two_months_ago and t.outstanding_amount > 0
+    provision = (
+        db.session.query(func.coalesce(func.sum(DebtTransaction.outstanding_amount), 0))
+        .filter(
+            DebtTransaction.date <= end_datetime,
+            DebtTransaction.due_date < two_months_ago,
+            DebtTransaction.outstanding_amount > 0
+        )
+        .scalar()
     )
 
     net_receivables = gross_receivables - provision
 
-    # Fixed Assets
-    assets = FixedAsset.query.all()
-    total_fixed_assets = sum(a.book_value() for a in assets)
-
     total_assets = (
-        cash_balance +
+        cash_on_hand +
         inventory_value +
         net_receivables +
         total_fixed_assets
@@ -273,36 +304,26 @@ def balance_sheet():
     # LIABILITIES
     # -------------------------
 
-    total_liabilities = 0  # purchases immediately paid
+    # Supplier invoices (purchases) not yet paid
+    accounts_payable = balances["payables"]
+
+    total_liabilities = accounts_payable
 
     # -------------------------
     # EQUITY
     # -------------------------
 
-    total_sales = (
-        db.session.query(db.func.sum(Sale.total_price)).scalar() or 0
-    )
+    retained_earnings = balances["retained_earnings"] - provision
 
-    total_cogs = (
-        db.session.query(db.func.sum(Sale.quantity * Product.cost_price))
-        .join(Product).scalar() or 0
-    )
-
-    total_expenses = (
-        db.session.query(db.func.sum(Expense.amount)).scalar() or 0
-    )
-
-    retained_earnings = total_sales - total_cogs - total_expenses - provision
-
-    owner_equity = total_assets - retained_earnings
+    owner_equity = total_assets - total_liabilities - retained_earnings
 
     total_equity = owner_equity + retained_earnings
 
-    return jsonify({
+    return {
         "report_type": "Balance Sheet",
         "sections": {
             "assets": {
-                "cash": float(cash_balance),
+                "cash": float(cash_on_hand),
                 "inventory": float(inventory_value),
                 "accounts_receivable": float(gross_receivables),
                 "provision_for_bad_debts": -float(provision),
@@ -311,6 +332,7 @@ def balance_sheet():
                 "total_assets": float(total_assets)
             },
             "liabilities": {
+                "accounts_payable": float(accounts_payable),
                 "total_liabilities": float(total_liabilities)
             },
             "equity": {
@@ -318,6 +340,48 @@ def balance_sheet():
                 "owner_equity": float(owner_equity),
                 "total_equity": float(total_equity)
             },
-            "total_liabilities_and_equity": float(total_equity)
+            "total_liabilities_and_equity": float(total_liabilities + total_equity)
         }
-    }), 200
\ No newline at end of file
+    }
+
+
+@reports_bp.route("/periods", methods=["GET"])
+@jwt_required()
+@role_required("admin")
+def list_period_closes():
+    periods = PeriodClose.query.order_by(PeriodClose.period_end.desc()).all()
+    return jsonify([p.to_dict() for p in periods]), 200
+
+
+@reports_bp.route("/periods/close", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def close_period_route():
+    from flask_jwt_extended import get_jwt_identity
+
+    data = request.get_json() or {}
+
+    try:
+        period_end = datetime.strptime(data.get("period_end") or "", "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "period_end must be YYYY-MM-DD"}), 400
+
+    try:
+        snapshot = close_period(period_end, closed_by=get_jwt_identity())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    db.session.commit()
+    return jsonify(snapshot.to_dict()), 201
+
+
+@reports_bp.route("/periods/latest", methods=["DELETE"])
+@jwt_required()
+@role_required("admin")
+def reopen_period_route():
+    snapshot = reopen_latest_period()
+    if not snapshot:
+        return jsonify({"error": "No closed periods"}), 404
+
+    db.session.commit()
+    return jsonify({"message": f"Period ending {snapshot.period_end.isoformat()} reopened"}), 200
@@ -2,16 +2,23 @@
 
 from datetime import datetime, timedelta, date
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt_identity, get_jwt, jwt_required
+from sqlalchemy.orm import joinedload
 from backend.utils.decorators import role_required
 from ..models import Product, Sale, DailyClose
 from ..models.product import DailyCloseAdjustment
+from ..services.sales_service import (
+    lock_products, build_sale, apply_sale_adjustment, void_sale_adjustment
+)
+from ..utils.dates import on_day, LOCK_DAYS
+from ..utils.sales_fact import post_sales, post_daily_closes, post_sales_fact, sales_totals
+from ..utils.cost_layers import load_open_layers, consume_layers, receive_layer
 from ..extensions import db
 
 sales_bp = Blueprint("sales", __name__)
 
 def is_locked(daily_close: DailyClose):
-    return datetime.utcnow().date() > daily_close.date + timedelta(days=3)
+    return datetime.utcnow().date() > daily_close.date + timedelta(days=LOCK_DAYS)
 
 
 @sales_bp.route("/sell", methods=["POST"])
@@ -24,36 +31,29 @@ def sell_product():
     if not all(data.get(k) for k in required):
         return jsonify({"error": "Missing required data"}), 400
 
-    product = Product.query.get(data["product_id"])
-    if not product:
-        return jsonify({"error": "Product not found"}), 404
-
     try:
+        product_id = int(data["product_id"])
         quantity = int(data["quantity"])
     except (ValueError, TypeError):
-        return jsonify({"error": "Quantity must be integer"}), 400
+        return jsonify({"error": "product_id and quantity must be integers"}), 400
 
     if quantity <= 0:
         return jsonify({"error": "Quantity must be greater than 0"}), 400
 
+    # Row lock: a concurrent sale of the same product waits for this one
+    product = lock_products([product_id]).get(product_id)
+    if not product:
+        db.session.rollback()  # release the row lock
+        return jsonify({"error": "Product not found"}), 404
+
     if product.stock < quantity:
+        db.session.rollback()  # release the row lock
         return jsonify({"error": "Not enough stock"}), 400
 
-    total_price = quantity * product.unit_price
-    total_cost = quantity * product.cost_price
-
-    sale = Sale(
-        product_id=product.id,
-        quantity=quantity,
-        total_price=total_price,
-        total_cost=total_cost,
-        sale_type=data["sale_type"],
-        issued_by=get_jwt_identity(),
-    )
-
-    product.stock -= quantity
+    sale = build_sale(product, quantity, data["sale_type"], get_jwt_identity())
 
     db.session.add(sale)
+    post_sales([sale])
     db.session.commit()
 
     return jsonify({
@@ -62,6 +62,168 @@ def sell_product():
     }), 201
 
 
+@sales_bp.route("/sell/batch", methods=["POST"])
+@jwt_required()
+@role_required("admin", "cashier")
+def sell_batch():
+    """
+    Cart checkout: many lines, one transaction.
+    Body: {"sale_type": "cash", "items": [{"product_id": 1, "quantity": 2, "sale_type"?: "debt"}, ...]}
+    Either every line is recorded or none is.
+    """
+    data = request.get_json() or {}
+    items = data.get("items") or []
+    default_sale_type = data.get("sale_type")
+    issued_by = get_jwt_identity()
+
+    if not items:
+        return jsonify({"error": "No items provided"}), 400
+
+    lines = []
+    errors = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"line": index, "error": "Each line must be an object"})
+            continue
+        try:
+            product_id = int(item.get("product_id"))
+            quantity = int(item.get("quantity"))
+        except (ValueError, TypeError):
+            errors.append({"line": index, "error": "product_id and quantity must be integers"})
+            continue
+
+        sale_type = item.get("sale_type") or default_sale_type
+
+        if quantity <= 0:
+            errors.append({"line": index, "error": "Quantity must be greater than 0"})
+        elif not sale_type:
+            errors.append({"line": index, "error": "Missing sale_type"})
+        else:
+            lines.append((index, product_id, quantity, sale_type))
+
+    if errors:
+        return jsonify({"error": "Invalid cart", "lines": errors}), 400
+
+    # One IN query, rows locked until commit
+    products = lock_products(product_id for _, product_id, _, _ in lines)
+
+    # The same product may appear on several lines
+    requested = {}
+    for _, product_id, quantity, _ in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+
+    for index, product_id, _, _ in lines:
+        product = products.get(product_id)
+        if not product:
+            errors.append({"line": index, "error": f"Product ID {product_id} not found"})
+        elif product.stock < requested[product_id]:
+            errors.append({
+                "line": index,
+                "error": f"Not enough stock for {product.name}",
+                "available": product.stock,
+            })
+
+    if errors:
+        db.session.rollback()  # release the row locks
+        return jsonify({"error": "Cart rejected", "lines": errors}), 400
+
+    # Open cost layers for the whole cart in one query
+    layers = load_open_layers(products)
+
+    sales = [
+        build_sale(products[product_id], quantity, sale_type, issued_by, layers)
+        for _, product_id, quantity, sale_type in lines
+    ]
+
+    # Flushed as one multi-row INSERT ... RETURNING
+    db.session.add_all(sales)
+    db.session.flush()
+    post_sales(sales)
+
+    results = [
+        {
+            "line": index,
+            "sale_id": sale.id,
+            "product_id": sale.product_id,
+            "quantity": sale.quantity,
+            "total_price": float(sale.total_price),
+        }
+        for (index, _, _, _), sale in zip(lines, sales)
+    ]
+    total_price = sum(r["total_price"] for r in results)
+
+    db.session.commit()
+
+    return jsonify({
+        "message": "Sale recorded successfully",
+        "sales": results,
+        "total_price": round(total_price, 2),
+    }), 201
+
+
+@sales_bp.route("/sales/<int:sale_id>/adjust", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def adjust_sale(sale_id):
+    data = request.get_json() or {}
+    reason = data.get("reason")
+
+    if not reason:
+        return jsonify({"error": "reason required"}), 400
+
+    try:
+        price_delta = float(data.get("price_delta", 0))
+        cost_delta = float(data.get("cost_delta", 0))
+        quantity_delta = int(data.get("quantity_delta", 0))
+    except (ValueError, TypeError):
+        return jsonify({"error": "Deltas must be numeric"}), 400
+
+    if not (price_delta or cost_delta or quantity_delta):
+        return jsonify({"error": "Nothing to adjust"}), 400
+
+    try:
+        adjustment = apply_sale_adjustment(
+            sale_id, price_delta, cost_delta, quantity_delta, reason, get_jwt_identity()
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    if not adjustment:
+        return jsonify({"error": "Sale not found"}), 404
+
+    db.session.commit()
+
+    return jsonify({
+        "message": "Adjustment successful",
+        "adjustment": adjustment.to_dict(),
+        "sale": adjustment.sale.to_dict(),
+    }), 201
+
+
+@sales_bp.route("/sales/adjustments/<int:adjustment_id>/void", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def void_adjustment(adjustment_id):
+    try:
+        adjustment = void_sale_adjustment(adjustment_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    if not adjustment:
+        return jsonify({"error": "Adjustment not found"}), 404
+
+    db.session.commit()
+
+    return jsonify({
+        "message": "Adjustment voided",
+        "adjustment": adjustment.to_dict(),
+        "sale": adjustment.sale.to_dict(),
+    }), 200
+
+
 @sales_bp.route("/daily_close", methods=["POST"])
 @jwt_required()
 @role_required("admin", "cashier")
@@ -77,18 +239,39 @@ def daily_close():
     total_revenue = 0
     total_profit = 0
 
+    user_role = get_jwt().get("role", "cashier")
+
     try:
+        product_ids = []
         for item in items:
-            product = Product.query.get(item.get("product_id"))
+            try:
+                product_ids.append(int(item.get("product_id")))
+            except (ValueError, TypeError):
+                raise ValueError(f"Product ID {item.get('product_id')} not found")
+
+        # All products in one IN query (locked, stock is about to be reset)
+        products = lock_products(product_ids)
+
+        # Open cost layers for every product in one query
+        layers = load_open_layers(products)
+
+        # Latest close per product in one grouped query
+        last_close_dates = dict(
+            db.session.query(DailyClose.product_id, db.func.max(DailyClose.date))
+            .filter(DailyClose.product_id.in_(products.keys()))
+            .group_by(DailyClose.product_id)
+            .all()
+        )
+
+        for item, product_id in zip(items, product_ids):
+            product = products.get(product_id)
             if not product:
                 raise ValueError(f"Product ID {item.get('product_id')} not found")
 
-            last_close = DailyClose.query.filter_by(product_id=product.id).order_by(DailyClose.date.desc()).first()
-            identity = get_jwt_identity()
-            user_role = identity.get("role") if isinstance(identity, dict) else "cashier"
+            last_close_date = last_close_dates.get(product.id)
 
-            if last_close and user_role != "admin":
-                last_close_datetime = datetime.combine(last_close.date, datetime.min.time()) if isinstance(last_close.date, date) else last_close.date
+            if last_close_date and user_role != "admin":
+                last_close_datetime = datetime.combine(last_close_date, datetime.min.time()) if isinstance(last_close_date, date) else last_close_date
                 time_diff = datetime.utcnow() - last_close_datetime
                 if time_diff < timedelta(hours=2):
                     minutes_left = int((timedelta(hours=2) - time_diff).total_seconds() // 60)
@@ -101,7 +284,7 @@ def daily_close():
                 raise ValueError(f"Closing stock for {product.name} cannot exceed opening stock")
 
             revenue = sold * product.unit_price
-            profit = sold * (product.unit_price - product.cost_price)
+            profit = revenue - consume_layers(product, sold, layers)
 
             daily_close_record = DailyClose(
                 product_id=product.id,
@@ -117,17 +300,22 @@ def daily_close():
             # Update stock to new baseline
             product.stock = closing_stock
 
-            db.session.add(daily_close_record)
             created_daily_closes.append(daily_close_record)
 
             total_revenue += revenue
             total_profit += profit
 
+        # Flushed as one multi-row INSERT ... RETURNING
+        db.session.add_all(created_daily_closes)
+        db.session.flush()
+        daily_close_ids = [dc.id for dc in created_daily_closes]
+        post_daily_closes(created_daily_closes)
+
         db.session.commit()
 
         return jsonify({
             "message": "Shift close processed successfully",
-            "daily_close_ids": [dc.id for dc in created_daily_closes],
+            "daily_close_ids": daily_close_ids,
             "total_revenue": round(total_revenue, 2),
             "total_profit": round(total_profit, 2),
         }), 200
@@ -151,27 +339,45 @@ def adjust_closing_stock(dc_id):
     if reason is None or new_closing_stock is None:
         return jsonify({"error": "new_closing_stock and reason required"}), 400
 
-    daily_close = DailyClose.query.get_or_404(dc_id)
-    product = daily_close.product
-
-    if is_locked(daily_close):
-        return jsonify({"error": "Daily close locked after 3 days"}), 403
-
     try:
         new_closing_stock = int(new_closing_stock)
-    except ValueError:
+    except (ValueError, TypeError):
         return jsonify({"error": "Invalid closing stock"}), 400
 
     if new_closing_stock < 0:
         return jsonify({"error": "Closing stock cannot be negative"}), 400
 
+    daily_close = DailyClose.query.get_or_404(dc_id)
+
+    if is_locked(daily_close):
+        return jsonify({"error": "Daily close locked after 3 days"}), 403
+
+    # Row lock on the product (stock and cost layers), then re-read the close
+    product = lock_products([daily_close.product_id]).get(daily_close.product_id)
+    if not product:
+        db.session.rollback()  # release the row lock
+        return jsonify({"error": "Product not found"}), 404
+    db.session.refresh(daily_close)
+
     previous_closing = daily_close.closing_stock
 
     difference = new_closing_stock - previous_closing
     units_delta = -difference  # opposite direction
 
     revenue_delta = units_delta * product.unit_price
-    profit_delta = units_delta * (product.unit_price - product.cost_price)
+
+    # More sold: cost from the layers; fewer: back at the close's unit cost
+    # (the current cost price if the close sold nothing)
+    if units_delta > 0:
+        cost_delta = consume_layers(product, units_delta)
+    else:
+        if daily_close.units_sold:
+            unit_cost = (daily_close.revenue - daily_close.profit) / daily_close.units_sold
+        else:
+            unit_cost = float(product.cost_price or 0)
+        cost_delta = units_delta * unit_cost
+        receive_layer(product, -units_delta, unit_cost, "return")
+    profit_delta = revenue_delta - cost_delta
 
     # Adjust product stock to match physical correction
     product.stock += difference
@@ -194,6 +400,10 @@ def adjust_closing_stock(dc_id):
     )
 
     db.session.add(adjustment)
+    post_sales_fact(
+        daily_close.date, product.id, "close",
+        units_delta, revenue_delta, revenue_delta - profit_delta,
+    )
     db.session.commit()
 
     return jsonify({
@@ -222,7 +432,7 @@ def daily_close_report(date):
         return jsonify({"error": "Invalid date format"}), 400
 
     records = DailyClose.query.filter(
-        DailyClose.date == query_date
+        on_day(DailyClose.date, query_date)
     ).all()
 
     if not records:
@@ -263,16 +473,17 @@ def daily_close_summary(date):
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    records = DailyClose.query.filter(
-        DailyClose.date == query_date
-    ).all()
+    records = (
+        DailyClose.query
+        .options(joinedload(DailyClose.product))
+        .filter(on_day(DailyClose.date, query_date))
+        .all()
+    )
 
     if not records:
         return jsonify({"message": "No daily close found for this date"}), 404
 
-    total_revenue = sum(r.revenue for r in records)
-    total_profit = sum(r.profit for r in records)
-    total_units = sum(r.units_sold for r in records)
+    total_units, total_revenue, _, total_profit = sales_totals("close", query_date)
 
     products = [
         {
@@ -302,7 +513,7 @@ def get_today_daily_close():
     today = datetime.utcnow().date()
 
     closes = DailyClose.query.filter(
-        DailyClose.date == today,
+        on_day(DailyClose.date, today),
         DailyClose.units_sold > 0
     ).all()
 
@@ -6,6 +6,8 @@ from datetime import datetime
 from ..models import Product, Sale, Expense, PurchaseOffer
 from ..extensions import db
 from ..utils.decorators import role_required
+from ..utils.cost_layers import receive_layer, consume_layers
+from ..services.sales_service import lock_products
 
 special_bp = Blueprint("special_bp", __name__, url_prefix="/api/special")
 
@@ -72,6 +74,7 @@ def report_damaged_stock():
     reason = data.get("reason", "Damaged")
     user = get_jwt_identity()
 
+    lock_products([product_id])  # held until commit; layers are per product
     product = Product.query.get(product_id)
     if not product:
         return jsonify({"error": "Product not found"}), 404
@@ -83,10 +86,10 @@ def report_damaged_stock():
     # Reduce stock
     product.stock -= quantity
 
-    # Record expense for P&L
+    # Record expense for P&L, at the cost of the layers written off
     expense = Expense(
         name=f"{reason} - {product.name}",
-        amount=product.cost_price * quantity,
+        amount=consume_layers(product, quantity),
         recorded_by=user,
         date=datetime.utcnow()
     )
@@ -109,14 +112,16 @@ def add_offer():
     purchase_id = data.get("purchase_id")  # optional
     user = get_jwt_identity()
 
+    lock_products([product_id])  # held until commit; layers are per product
     product = Product.query.get(product_id)
     if not product:
         return jsonify({"error": "Product not found"}), 404
     if quantity <= 0:
         return jsonify({"error": "Quantity must be greater than 0"}), 400
 
-    # Add free stock
+    # Add free stock, as a zero-cost layer
     product.stock += quantity
+    receive_layer(product, quantity, 0.0, "offer", purchase_id)
 
     offer = PurchaseOffer(
         purchase_id=purchase_id,
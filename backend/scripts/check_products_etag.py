@@ -0,0 +1,56 @@
+"""
+Products ETag check against a real database (DATABASE_URL):
+
+    python backend/scripts/check_products_etag.py
+
+1. A product change marks the transaction as touching report inputs (the
+   change is flushed, then rolled back: no product data is modified).
+2. Bumping the data version, which is what that transaction's commit does,
+   changes the /api/products ETag, including the very first bump on a fresh
+   data_version_seq.
+
+Exits 1 on failure.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app import create_app  # noqa: E402
+from backend.extensions import db  # noqa: E402
+from backend.models import Product  # noqa: E402
+from backend.utils.report_cache import bump_data_version  # noqa: E402
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    failures = []
+
+    with app.app_context():
+        product = Product.query.order_by(Product.id).first()
+        if product is None:
+            raise SystemExit("No products to check against")
+
+        product.unit_price = (product.unit_price or 0) + 1
+        db.session.flush()
+        if not db.session.info.get("report_data_changed"):
+            failures.append("a product write is not tracked as a data change")
+        db.session.rollback()
+
+        before = client.get("/api/products?fields=id").headers.get("ETag")
+        bump_data_version()
+        after = client.get("/api/products?fields=id").headers.get("ETag")
+
+        print(f"ETag before: {before}")
+        print(f"ETag after:  {after}")
+        if before == after:
+            failures.append("the ETag did not change after a data version bump")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
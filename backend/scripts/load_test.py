@@ -0,0 +1,146 @@
+"""
+Load test for the sell and dashboard endpoints (stdlib only).
+
+Run against a server started in each worker mode and compare:
+
+    GUNICORN_WORKER_CLASS=sync   ./backend/entrypoint.sh
+    GUNICORN_WORKER_CLASS=gevent ./backend/entrypoint.sh
+
+    python backend/scripts/load_test.py --base-url http://localhost:5000 \\
+        --email admin@barpos.local --password admin123 --product-ids 1-20 \\
+        --concurrency 30 --duration 20 --mix sell=4,dashboard=2,report=1
+
+"report" hits the balance sheet with a fresh date each time (cache miss),
+standing in for the slow requests that tie up sync workers.
+Sales made by the test are real rows; point it at a scratch database.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+
+def request(base_url, method, path, token=None, body=None, timeout=30):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status, resp.read()
+
+
+def login(base_url, email, password):
+    _, body = request(base_url, "POST", "/auth/login", body={"email": email, "password": password})
+    return json.loads(body)["token"]
+
+
+def scenarios(product_ids):
+    def sell():
+        # Spread over several products: one product would serialise every
+        # sale on its row lock and measure that instead of the server
+        product_id = random.choice(product_ids)
+        return "POST", "/api/sell", {"product_id": product_id, "quantity": 1, "sale_type": "cash"}
+
+    def dashboard():
+        return "GET", "/admin/dashboard", None
+
+    def report():
+        day = date.today() - timedelta(days=random.randint(0, 3650))
+        return "GET", f"/api/reports/balance_sheet?end_date={day.isoformat()}", None
+
+    return {"sell": sell, "dashboard": dashboard, "report": report}
+
+
+def parse_ids(spec):
+    ids = []
+    for part in spec.split(","):
+        low, _, high = part.partition("-")
+        ids.extend(range(int(low), int(high or low) + 1))
+    return ids
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def run(args):
+    token = login(args.base_url, args.email, args.password)
+    available = scenarios(parse_ids(args.product_ids))
+    weights = parse_mix(args.mix)
+
+    names = [n for n in weights if n in available]
+    if not names:
+        raise SystemExit(f"--mix must use some of: {', '.join(available)}")
+
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def user():
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights=[weights[n] for n in names])[0]
+            method, path, body = available[name]()
+
+            started = time.perf_counter()
+            try:
+                status, _ = request(args.base_url, method, path, token, body)
+                ok = status < 400
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.perf_counter() - started
+
+            with lock:
+                if ok:
+                    results[name]["latencies"].append(elapsed)
+                else:
+                    results[name]["errors"] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(user)
+    wall = time.monotonic() - started
+
+    total = 0
+    print(f"{'endpoint':<10} {'ok':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in names:
+        latencies = sorted(results[name]["latencies"])
+        total += len(latencies)
+        if latencies:
+            q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0]] * 99
+            p50, p95, p99 = (q[49] * 1000, q[94] * 1000, q[98] * 1000)
+        else:
+            p50 = p95 = p99 = 0.0
+        print(
+            f"{name:<10} {len(latencies):>7} {results[name]['errors']:>5} "
+            f"{len(latencies) / wall:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}"
+        )
+    print(f"{'total':<10} {total:>7} {'':>5} {total / wall:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--email", default="admin@barpos.local")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--product-ids", required=True, help='e.g. "1-20" or "1,4,7"; needs plenty of stock')
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--duration", type=int, default=20, help="seconds")
+    parser.add_argument("--mix", default="sell=4,dashboard=2,report=1")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
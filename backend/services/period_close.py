@@ -0,0 +1,160 @@
+# backend/services/period_close.py
+
+import calendar
+from datetime import datetime, timedelta
+from sqlalchemy import func, and_
+from ..models import Expense, FixedAsset
+from ..models.debtors import DebtTransaction, DebtPayment
+from ..models.purchases import Purchase, SupplierPayment
+from ..models.sales_fact import DailySalesFact
+from ..models.period_close import PeriodClose
+from ..utils.cash_ledger import cash_balance
+from ..utils import cost_layers
+from ..utils.dates import LOCK_DAYS
+from ..extensions import db
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _window(column, after, through):
+    """column falls after `after` (exclusive, open if None) and on or before `through`."""
+    clauses = [column < through + timedelta(days=1)]
+    if after is not None:
+        clauses.append(column >= after + timedelta(days=1))
+    return and_(*clauses)
+
+
+def last_period_close(on_or_before):
+    return (
+        PeriodClose.query
+        .filter(PeriodClose.period_end <= _as_date(on_or_before))
+        .order_by(PeriodClose.period_end.desc())
+        .first()
+    )
+
+
+def balances_as_of(as_of):
+    """
+    Cumulative sales, COGS, expenses, retained earnings (before provision),
+    cash, receivables and supplier payables as of the end of `as_of`: the latest snapshot on or
+    before it plus the movements since. Without a snapshot the window starts
+    at the beginning of history.
+    Returns (balances dict, snapshot or None).
+    """
+    through = _as_date(as_of)
+    snapshot = last_period_close(through)
+    after = snapshot.period_end if snapshot else None
+
+    sales, cogs = (
+        db.session.query(
+            func.coalesce(func.sum(DailySalesFact.revenue), 0),
+            func.coalesce(func.sum(DailySalesFact.cost), 0),
+        )
+        .filter(DailySalesFact.source == "sale", _window(DailySalesFact.date, after, through))
+        .one()
+    )
+
+    expenses = (
+        db.session.query(func.coalesce(func.sum(Expense.amount), 0))
+        .filter(_window(Expense.date, after, through))
+        .scalar()
+    )
+
+    issued = (
+        db.session.query(func.coalesce(func.sum(DebtTransaction.amount), 0))
+        .filter(_window(DebtTransaction.date, after, through))
+        .scalar()
+    )
+    collected = (
+        db.session.query(func.coalesce(func.sum(DebtPayment.amount), 0))
+        .filter(_window(DebtPayment.date, after, through))
+        .scalar()
+    )
+
+    invoiced = (
+        db.session.query(func.coalesce(func.sum(Purchase.total_cost), 0))
+        .filter(_window(Purchase.purchase_date, after, through))
+        .scalar()
+    )
+    supplier_paid = (
+        db.session.query(func.coalesce(func.sum(SupplierPayment.amount), 0))
+        .filter(_window(SupplierPayment.date, after, through))
+        .scalar()
+    )
+
+    cash = cash_balance(after=after, through=through)
+
+    balances = {
+        "total_sales": float(sales),
+        "total_cogs": float(cogs),
+        "total_expenses": float(expenses),
+        "cash": cash,
+        "receivables": float(issued) - float(collected),
+        "payables": float(invoiced) - float(supplier_paid),
+    }
+
+    if snapshot:
+        for key in balances:
+            balances[key] += getattr(snapshot, key)
+
+    balances["retained_earnings"] = (
+        balances["total_sales"] - balances["total_cogs"] - balances["total_expenses"]
+    )
+
+    return balances, snapshot
+
+
+def inventory_value():
+    """Stock on hand at cost (live), valued from the open cost layers."""
+    return cost_layers.inventory_value()
+
+
+def fixed_assets_book_value():
+    return float(sum(a.book_value() for a in FixedAsset.query.all()))
+
+
+def month_end(year, month):
+    return datetime(year, month, calendar.monthrange(year, month)[1]).date()
+
+
+def close_period(period_end, closed_by=None):
+    """
+    Writes the month-end snapshot for period_end (the last day of a month).
+    The period must be past the LOCK_DAYS adjustment window and later than
+    the latest existing snapshot. Inventory and fixed assets are valued as
+    of the moment of closing. Raises ValueError. Caller commits.
+    """
+    period_end = _as_date(period_end)
+
+    if period_end != month_end(period_end.year, period_end.month):
+        raise ValueError("period_end must be the last day of a month")
+
+    if datetime.utcnow().date() <= period_end + timedelta(days=LOCK_DAYS):
+        raise ValueError(f"Period can be closed {LOCK_DAYS} days after it ends")
+
+    latest = PeriodClose.query.order_by(PeriodClose.period_end.desc()).first()
+    if latest and latest.period_end >= period_end:
+        raise ValueError(f"Periods through {latest.period_end.isoformat()} are already closed")
+
+    balances, _ = balances_as_of(period_end)
+
+    snapshot = PeriodClose(
+        period_end=period_end,
+        inventory_value=inventory_value(),
+        fixed_assets=fixed_assets_book_value(),
+        closed_by=closed_by,
+        **balances,
+    )
+    db.session.add(snapshot)
+
+    return snapshot
+
+
+def reopen_latest_period():
+    """Deletes the latest snapshot. Returns it, or None. Caller commits."""
+    latest = PeriodClose.query.order_by(PeriodClose.period_end.desc()).first()
+    if latest:
+        db.session.delete(latest)
+    return latest
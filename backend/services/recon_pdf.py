@@ -0,0 +1,148 @@
+# backend/services/recon_pdf.py
+#
+# ReportLab layouts for reconciliation reports. Only imported when a PDF is
+# actually rendered (see services.recon_report), so workers that never
+# render one never load ReportLab.
+
+from io import BytesIO
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.lib import colors
+from reportlab.lib import pagesizes
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+
+
+def reconciliation_elements(data, styles):
+    """ReportLab flowables for one reconciliation."""
+    elements = []
+
+    # Title
+    elements.append(Paragraph("RECONCILIATION REPORT", styles["Heading1"]))
+    elements.append(Spacer(1, 0.3 * inch))
+
+    # Basic Info Table
+    info_data = [
+        ["Date", data["date"]],
+        ["Created At", data["created_at"]],
+        ["Recorded By", data["created_by"]],
+    ]
+
+    info_table = Table(info_data, colWidths=[150, 300])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ]))
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.4 * inch))
+
+    # Financial Summary Table
+    summary_data = [
+        ["Total Sales", f"KSh {data['total_sales']:,.2f}"],
+        ["Total Expenses", f"KSh {data['total_expenses']:,.2f}"],
+        ["Mpesa Total", f"KSh {data['mpesa_total']:,.2f}"],
+        ["Cash on Hand", f"KSh {data['cash_on_hand']:,.2f}"],
+        ["Adjustments Total", f"KSh {data['adjustments_total']:,.2f}"],
+        ["Surplus / Shortfall", f"KSh {data['difference']:,.2f}"],
+    ]
+
+    summary_table = Table(summary_data, colWidths=[200, 250])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ]))
+
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.4 * inch))
+
+    # Adjustments Section
+    if data["lines"]:
+        elements.append(Paragraph("Adjustments", styles["Heading2"]))
+        elements.append(Spacer(1, 0.2 * inch))
+
+        lines_data = [["Type", "Description", "Amount"]]
+
+        for l in data["lines"]:
+            lines_data.append([
+                l["kind"],
+                l["description"],
+                f"KSh {l['amount']:,.2f}"
+            ])
+
+        lines_table = Table(lines_data, colWidths=[100, 250, 100])
+        lines_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+
+        elements.append(lines_table)
+
+    # Notes
+    if data["notes"]:
+        elements.append(Spacer(1, 0.4 * inch))
+        elements.append(Paragraph("Notes:", styles["Heading2"]))
+        elements.append(Paragraph(data["notes"], styles["Normal"]))
+
+    return elements
+
+
+def render_reconciliation_pdf(data):
+    """Renders the report to PDF bytes. No DB access, safe in a worker thread."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
+    doc.build(reconciliation_elements(data, getSampleStyleSheet()))
+    return buffer.getvalue()
+
+
+def range_summary_elements(items, start, end, styles):
+    """Cover page for a range export: one row per reconciliation plus totals."""
+    elements = [
+        Paragraph("RECONCILIATION REPORTS", styles["Heading1"]),
+        Paragraph(f"{start} to {end}", styles["Normal"]),
+        Spacer(1, 0.3 * inch),
+    ]
+
+    rows = [["Date", "Sales", "Expenses", "Counted", "Surplus / Shortfall"]]
+    for data in items:
+        rows.append([
+            data["date"],
+            f"KSh {data['total_sales']:,.2f}",
+            f"KSh {data['total_expenses']:,.2f}",
+            f"KSh {data['mpesa_total'] + data['cash_on_hand']:,.2f}",
+            f"KSh {data['difference']:,.2f}",
+        ])
+    rows.append([
+        "Total",
+        f"KSh {sum(d['total_sales'] for d in items):,.2f}",
+        f"KSh {sum(d['total_expenses'] for d in items):,.2f}",
+        f"KSh {sum(d['mpesa_total'] + d['cash_on_hand'] for d in items):,.2f}",
+        f"KSh {sum(d['difference'] for d in items):,.2f}",
+    ])
+
+    table = Table(rows, colWidths=[80, 95, 95, 95, 105], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ]))
+    elements.append(table)
+
+    return elements
+
+
+def render_range_pdf(items, start, end):
+    """One document: summary page, then each reconciliation on its own page."""
+    styles = getSampleStyleSheet()
+    elements = range_summary_elements(items, start, end, styles)
+
+    for data in items:
+        elements.append(PageBreak())
+        elements.extend(reconciliation_elements(data, styles))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,183 @@
+# backend/services/recon_report.py
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+from sqlalchemy.orm import selectinload
+from ..models.cashmovements import CashMovement
+from ..models.reconciliation import Reconciliation
+from ..models.sales_fact import DailySalesFact
+from ..utils.sales_fact import sales_totals
+from ..utils.dates import on_day
+from ..extensions import db
+
+
+def reconciliation_report_data(recon):
+    """
+    Everything the PDF shows, as plain JSON-able data. Built in the request
+    (needs the DB); rendering only needs this dict, so it can run off-thread.
+    """
+    _, total_sales, _, _ = sales_totals("close", recon.date)
+
+    total_expenses = float(
+        db.session.query(db.func.coalesce(db.func.sum(CashMovement.amount), 0))
+        .filter(on_day(CashMovement.date, recon.date), CashMovement.type == "outflow")
+        .scalar()
+    )
+
+    return _report_data(recon, total_sales, total_expenses)
+
+
+def reconciliation_range_data(start, end):
+    """
+    Report data for every reconciliation dated start..end, oldest first, in
+    four queries: reconciliations, their lines, close revenue per day and
+    outflows per day.
+    """
+    recons = (
+        Reconciliation.query
+        .options(selectinload(Reconciliation.lines))
+        .filter(Reconciliation.date >= start, Reconciliation.date <= end)
+        .order_by(Reconciliation.date.asc(), Reconciliation.created_at.asc(), Reconciliation.id.asc())
+        .all()
+    )
+
+    sales_by_day = dict(
+        db.session.query(DailySalesFact.date, db.func.sum(DailySalesFact.revenue))
+        .filter(
+            DailySalesFact.source == "close",
+            DailySalesFact.date >= start,
+            DailySalesFact.date <= end,
+        )
+        .group_by(DailySalesFact.date)
+        .all()
+    )
+
+    expenses_by_day = dict(
+        db.session.query(CashMovement.date, db.func.sum(CashMovement.amount))
+        .filter(
+            CashMovement.type == "outflow",
+            CashMovement.date >= start,
+            CashMovement.date <= end,
+        )
+        .group_by(CashMovement.date)
+        .all()
+    )
+
+    return [
+        _report_data(
+            recon,
+            float(sales_by_day.get(recon.date, 0)),
+            float(expenses_by_day.get(recon.date, 0)),
+        )
+        for recon in recons
+    ]
+
+
+def _report_data(recon, total_sales, total_expenses):
+    mpesa_total = recon.mpesa1 + recon.mpesa2 + recon.mpesa3
+    counted_total = mpesa_total + recon.cash_on_hand
+
+    lines = [
+        {"kind": l.kind, "description": l.description or "", "amount": float(l.amount)}
+        for l in recon.lines
+    ]
+    adjustments_total = sum(l["amount"] for l in lines)
+
+    return {
+        "id": recon.id,
+        "date": recon.date.isoformat(),
+        "created_at": recon.created_at.strftime("%Y-%m-%d %H:%M"),
+        "created_by": str(recon.created_by),
+        "total_sales": total_sales,
+        "total_expenses": total_expenses,
+        "mpesa_total": mpesa_total,
+        "cash_on_hand": recon.cash_on_hand,
+        "adjustments_total": adjustments_total,
+        "expected_cash": total_sales - adjustments_total,
+        "difference": counted_total - total_sales + adjustments_total,
+        "lines": lines,
+        "notes": recon.notes,
+    }
+
+
+def report_key(data):
+    """Content address: changes whenever anything shown in the PDF changes."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def report_path(cache_dir, recon_id, key):
+    return os.path.join(cache_dir, "recon", str(recon_id), f"{key}.pdf")
+
+
+def range_report_path(cache_dir, start, end, key, fmt):
+    return os.path.join(cache_dir, "range", f"{start}_{end}_{key}.{fmt}")
+
+
+def render_range_zip(items, cache_dir):
+    """
+    Zip of one PDF per reconciliation. Reuses (and fills) the single-report
+    disk cache, so days already downloaded are not rendered again.
+    """
+    buffer = BytesIO()
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for data in items:
+            path = report_path(cache_dir, data["id"], report_key(data))
+            if not os.path.exists(path):
+                write_report(path, data)
+            archive.write(path, arcname=f"reconciliation_{data['date']}_{data['id']}.pdf")
+
+    return buffer.getvalue()
+
+
+def write_report(path, data):
+    """
+    Renders and stores the PDF at path; older versions for the same
+    reconciliation are removed.
+    """
+    from .recon_pdf import render_reconciliation_pdf
+
+    return _store(path, render_reconciliation_pdf(data), stale_prefix="")
+
+
+def write_range_report(path, items, start, end, fmt, cache_dir):
+    """Renders and stores a range export (fmt "pdf" or "zip") at path."""
+    from .recon_pdf import render_range_pdf
+
+    if fmt == "zip":
+        content = render_range_zip(items, cache_dir)
+    else:
+        content = render_range_pdf(items, start, end)
+
+    return _store(path, content, stale_prefix=f"{start}_{end}_")
+
+
+def _store(path, content, stale_prefix):
+    """
+    Writes to a temp file and renames so readers never see a partial file,
+    then removes other files in the directory that start with stale_prefix
+    and share the extension (older versions of the same report).
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+    extension = os.path.splitext(path)[1]
+    for name in os.listdir(directory):
+        stale = os.path.join(directory, name)
+        if name.startswith(stale_prefix) and name.endswith(extension) and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    return path
@@ -0,0 +1,153 @@
+# backend/services/sales_service.py
+
+from ..models import Product, Sale
+from ..models.sales import SaleAdjustment
+from ..utils.sales_fact import post_sales_fact
+from ..utils.cost_layers import consume_layers, receive_layer
+from ..extensions import db
+
+
+def lock_products(product_ids):
+    """
+    Loads the given products in one IN query with SELECT ... FOR UPDATE.
+    Rows are locked in id order so two tills selling overlapping carts
+    always queue behind each other instead of deadlocking.
+    Returns {product_id: Product}.
+    """
+    products = (
+        Product.query
+        .filter(Product.id.in_(set(product_ids)))
+        .order_by(Product.id)
+        .with_for_update()
+        .all()
+    )
+    return {p.id: p for p in products}
+
+
+def build_sale(product, quantity, sale_type, issued_by, layers=None):
+    """
+    Creates the Sale for one line and takes the units off product.stock.
+    total_cost is the realized cost of the cost layers consumed. The product
+    must already be locked (see lock_products); pass `layers` from
+    load_open_layers when selling several lines. Caller adds and commits.
+    """
+    sale = Sale(
+        product_id=product.id,
+        quantity=quantity,
+        total_price=quantity * product.unit_price,
+        total_cost=consume_layers(product, quantity, layers),
+        sale_type=sale_type,
+        issued_by=issued_by,
+    )
+
+    product.stock -= quantity
+
+    return sale
+
+
+def apply_sale_adjustment(sale_id, price_delta, cost_delta, quantity_delta, reason, created_by):
+    """
+    Records a SaleAdjustment and folds it into the sale's stored adjusted
+    totals (and the sale day's fact row) in the same transaction. The sale
+    row is locked so concurrent adjustments apply one after the other. A
+    quantity change also moves product stock the opposite way, and its
+    cost_delta is what the cost layers moved: passing a different one raises
+    ValueError, as does a change that would leave the sale's quantity or the
+    product's stock below zero. Returns the adjustment, or None if the sale
+    does not exist. Caller commits.
+    """
+    sale = db.session.get(Sale, sale_id, with_for_update=True)
+    if not sale:
+        return None
+
+    if quantity_delta:
+        if sale.adjusted_quantity + quantity_delta < 0:
+            raise ValueError("Adjusted quantity cannot go below zero")
+        moved = _move_sold_units(sale, quantity_delta)
+        if cost_delta and abs(cost_delta - moved) > 0.005:
+            raise ValueError(
+                f"cost_delta must be {moved:.2f} (the cost of the units moved) or omitted"
+            )
+        cost_delta = moved
+
+    adjustment = SaleAdjustment(
+        sale_id=sale.id,
+        price_delta=price_delta,
+        cost_delta=cost_delta,
+        quantity_delta=quantity_delta,
+        previous_total_price=sale.adjusted_total_price,
+        previous_total_cost=sale.adjusted_total_cost,
+        previous_quantity=sale.adjusted_quantity,
+        reason=reason,
+        created_by=created_by,
+    )
+    db.session.add(adjustment)
+
+    sale.adjusted_total_price += price_delta
+    sale.adjusted_total_cost += cost_delta
+    sale.adjusted_quantity += quantity_delta
+
+    post_sales_fact(sale.date, sale.product_id, "sale", quantity_delta, price_delta, cost_delta)
+
+    return adjustment
+
+
+def void_sale_adjustment(adjustment_id):
+    """
+    Voids an adjustment and takes its deltas back out of the sale's stored
+    totals (and product stock). A quantity change is reversed on the cost
+    layers and its cost is what they moved. Raises ValueError if it is
+    already voided, or if reversing it would leave the sale's quantity or
+    the product's stock below zero. Returns the adjustment, or None if it
+    does not exist. Caller commits.
+    """
+    adjustment = db.session.get(SaleAdjustment, adjustment_id, with_for_update=True)
+    if not adjustment:
+        return None
+
+    if adjustment.is_voided:
+        raise ValueError("Adjustment already voided")
+
+    sale = db.session.get(Sale, adjustment.sale_id, with_for_update=True)
+    if sale.adjusted_quantity - adjustment.quantity_delta < 0:
+        raise ValueError("Adjusted quantity cannot go below zero")
+
+    adjustment.is_voided = True
+
+    cost_reversal = -adjustment.cost_delta
+    if adjustment.quantity_delta:
+        # Units it sold go back at what they cost
+        unit_cost = adjustment.cost_delta / adjustment.quantity_delta
+        cost_reversal = _move_sold_units(sale, -adjustment.quantity_delta, unit_cost)
+
+    sale.adjusted_total_price -= adjustment.price_delta
+    sale.adjusted_total_cost += cost_reversal
+    sale.adjusted_quantity -= adjustment.quantity_delta
+
+    post_sales_fact(
+        sale.date, sale.product_id, "sale",
+        -adjustment.quantity_delta, -adjustment.price_delta, cost_reversal,
+    )
+
+    return adjustment
+
+
+def _move_sold_units(sale, units, unit_cost=None):
+    """
+    units more (or, negative, fewer) sold on an existing sale: stock and cost
+    layers move the opposite way. Returned units go back at unit_cost
+    (default: the sale's unit cost). Returns the cost moved, negative for
+    returned units. Raises ValueError if there is not enough stock to sell.
+    """
+    product = lock_products([sale.product_id])[sale.product_id]
+    if units > product.stock:
+        raise ValueError(f"Not enough stock for {product.name}")
+    product.stock -= units
+
+    if units > 0:
+        return consume_layers(product, units)
+
+    if unit_cost is None:
+        unit_cost = float(sale.total_cost) / (sale.quantity or 1)
+    receive_layer(product, -units, unit_cost, "return")
+    return units * unit_cost
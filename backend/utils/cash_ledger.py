@@ -0,0 +1,161 @@
+# backend/utils/cash_ledger.py
+
+from datetime import datetime
+from sqlalchemy import func, case, insert, select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..models.cashmovements import CashMovement
+from ..models.cash_ledger import (
+    CashLedgerDay, CashFlowCategory,
+    DEFAULT_CASH_FLOW_SECTIONS, CASH_FLOW_SECTIONS,
+)
+from ..extensions import db
+from .period_lock import ensure_period_open
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def post_to_cash_ledger(date, category, type, amount, count=1):
+    """
+    Adds amount to the (date, category, type) ledger row, creating it if needed.
+    Runs inside the caller's transaction so it commits or rolls back with the
+    movement it mirrors. Raises PeriodClosedError for a date in a closed
+    period.
+    """
+    ensure_period_open(date)
+
+    stmt = pg_insert(CashLedgerDay).values(
+        date=_as_date(date),
+        category=category,
+        type=type,
+        amount=amount,
+        movement_count=count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["date", "category", "type"],
+        set_={
+            "amount": CashLedgerDay.amount + stmt.excluded.amount,
+            "movement_count": CashLedgerDay.movement_count + stmt.excluded.movement_count,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def record_cash_movement(date, source, type, category, amount, description=None,
+                         reference=None, recorded_by=None):
+    """
+    Creates:
+      - CashMovement row
+      - matching delta on the daily cash ledger
+    Returns the CashMovement object. Caller commits.
+    """
+    date = _as_date(date) or datetime.utcnow().date()
+
+    movement = CashMovement(
+        date=date,
+        source=source,
+        type=type,
+        category=category,
+        amount=amount,
+        description=description,
+        reference=reference,
+        recorded_by=recorded_by,
+    )
+    db.session.add(movement)
+
+    post_to_cash_ledger(date, category, type, amount)
+
+    return movement
+
+
+def cash_balance(before=None, through=None, after=None):
+    """
+    Net cash (inflows - outflows) from the ledger.
+      before=d  -> all days strictly before d (opening balance)
+      through=d -> all days up to and including d (closing balance)
+      after=d   -> only days strictly after d (movement since a snapshot)
+    """
+    signed = case(
+        (CashLedgerDay.type == "inflow", CashLedgerDay.amount),
+        else_=-CashLedgerDay.amount,
+    )
+    query = db.session.query(func.coalesce(func.sum(signed), 0))
+
+    if before is not None:
+        query = query.filter(CashLedgerDay.date < _as_date(before))
+    if through is not None:
+        query = query.filter(CashLedgerDay.date <= _as_date(through))
+    if after is not None:
+        query = query.filter(CashLedgerDay.date > _as_date(after))
+
+    return float(query.scalar() or 0)
+
+
+def rebuild_cash_ledger():
+    """
+    Recomputes the whole ledger from cash_movements. Used to backfill history
+    or to repair drift. Returns the number of ledger rows written.
+    """
+    db.session.execute(delete(CashLedgerDay))
+
+    grouped = select(
+        CashMovement.date,
+        CashMovement.category,
+        CashMovement.type,
+        func.sum(CashMovement.amount),
+        func.count(CashMovement.id),
+    ).group_by(CashMovement.date, CashMovement.category, CashMovement.type)
+
+    db.session.execute(
+        insert(CashLedgerDay).from_select(
+            ["date", "category", "type", "amount", "movement_count"], grouped
+        )
+    )
+
+    return db.session.query(func.count(CashLedgerDay.id)).scalar()
+
+
+def cash_flow_by_section(start, end):
+    """
+    Inflow/outflow totals per cash flow section for start..end (inclusive),
+    computed in one grouped query over the daily ledger joined to the
+    category -> section mapping. Categories without a mapping are ignored.
+    Returns {section: {"inflows": x, "outflows": y}} for every section.
+    """
+    inflows = func.sum(case(
+        (CashLedgerDay.type == "inflow", CashLedgerDay.amount), else_=0
+    ))
+    outflows = func.sum(case(
+        (CashLedgerDay.type == "inflow", 0), else_=CashLedgerDay.amount
+    ))
+
+    rows = (
+        db.session.query(CashFlowCategory.section, inflows, outflows)
+        .select_from(CashLedgerDay)
+        .join(CashFlowCategory, CashFlowCategory.category == CashLedgerDay.category)
+        .filter(
+            CashLedgerDay.date >= _as_date(start),
+            CashLedgerDay.date <= _as_date(end),
+        )
+        .group_by(CashFlowCategory.section)
+        .all()
+    )
+
+    totals = {s: {"inflows": 0.0, "outflows": 0.0} for s in CASH_FLOW_SECTIONS}
+    for section, section_in, section_out in rows:
+        totals[section] = {
+            "inflows": float(section_in or 0),
+            "outflows": float(section_out or 0),
+        }
+
+    return totals
+
+
+def seed_cash_flow_categories():
+    """Inserts the default category -> section mapping for unmapped categories."""
+    existing = {c.category for c in CashFlowCategory.query.all()}
+
+    for category, section in DEFAULT_CASH_FLOW_SECTIONS.items():
+        if category not in existing:
+            db.session.add(CashFlowCategory(category=category, section=section))
@@ -0,0 +1,176 @@
+# backend/utils/cost_layers.py
+
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, case, select
+from ..models import Product, CostLayer
+from ..extensions import db
+
+COST_METHODS = ("fifo", "average")
+
+
+def cost_method():
+    method = current_app.config.get("INVENTORY_COST_METHOD", "fifo")
+    if method not in COST_METHODS:
+        raise RuntimeError(f"Unknown INVENTORY_COST_METHOD: {method}")
+    return method
+
+
+def load_open_layers(product_ids):
+    """
+    Open layers for the given products in one IN query, oldest first.
+    Returns {product_id: [CostLayer, ...]}, to pass as `layers` below when a
+    request touches several products. The products must already be locked
+    (see services.sales_service.lock_products): the product row lock is what
+    serialises use of its layers.
+    """
+    layers = {product_id: [] for product_id in set(product_ids)}
+
+    rows = (
+        CostLayer.query
+        .filter(CostLayer.product_id.in_(layers.keys()), CostLayer.remaining > 0)
+        .order_by(CostLayer.product_id, CostLayer.received_at, CostLayer.id)
+        .all()
+    )
+    for layer in rows:
+        layers[layer.product_id].append(layer)
+
+    return layers
+
+
+def _open_layers(product, layers):
+    if layers is None:
+        layers = load_open_layers([product.id])
+    return layers.setdefault(product.id, [])
+
+
+def receive_layer(product, quantity, unit_cost, source, purchase_id=None, layers=None):
+    """
+    Adds a layer of quantity units at unit_cost for a locked product. With
+    the average method its open layers are first re-costed to the blended
+    average. Returns the CostLayer (None for quantity <= 0). Caller moves
+    the stock and commits.
+    """
+    if quantity <= 0:
+        return None
+
+    open_layers = _open_layers(product, layers)
+
+    if cost_method() == "average":
+        on_hand = sum(layer.remaining for layer in open_layers)
+        if on_hand > 0:
+            value = sum(layer.remaining * layer.unit_cost for layer in open_layers)
+            unit_cost = (value + quantity * unit_cost) / (on_hand + quantity)
+            for layer in open_layers:
+                layer.unit_cost = unit_cost
+
+    layer = CostLayer(
+        product_id=product.id,
+        source=source,
+        purchase_id=purchase_id,
+        quantity=quantity,
+        remaining=quantity,
+        unit_cost=unit_cost,
+        received_at=datetime.utcnow(),
+    )
+    db.session.add(layer)
+    open_layers.append(layer)
+
+    return layer
+
+
+def consume_layers(product, quantity, layers=None, purchase_id=None):
+    """
+    Takes quantity units of a locked product off its oldest open layers and
+    returns what they cost. With purchase_id, that purchase's own layers go
+    first (purchase undo). Units no layer covers (stock from before cost
+    layers, or driven negative) are costed at product.cost_price. Caller
+    moves the stock and commits.
+    """
+    if quantity <= 0:
+        return 0.0
+
+    open_layers = _open_layers(product, layers)
+    if purchase_id is not None:
+        open_layers = sorted(open_layers, key=lambda layer: layer.purchase_id != purchase_id)
+
+    cost = 0.0
+    left = quantity
+
+    for layer in open_layers:
+        if left == 0:
+            break
+        if layer.remaining <= 0:
+            continue
+        taken = min(layer.remaining, left)
+        layer.remaining -= taken
+        cost += taken * layer.unit_cost
+        left -= taken
+
+    return cost + left * float(product.cost_price or 0)
+
+
+def inventory_value():
+    """
+    Stock on hand at cost in one query: open layers, plus any stock they
+    don't cover at cost_price. Where layers hold more units than stock they
+    are scaled down to it.
+    """
+    layers = (
+        select(
+            CostLayer.product_id,
+            func.sum(CostLayer.remaining).label("units"),
+            func.sum(CostLayer.remaining * CostLayer.unit_cost).label("value"),
+        )
+        .where(CostLayer.remaining > 0)
+        .group_by(CostLayer.product_id)
+        .subquery()
+    )
+
+    units = func.coalesce(layers.c.units, 0)
+    value = func.coalesce(layers.c.value, 0)
+    stock = func.greatest(Product.stock, 0)
+
+    per_product = case(
+        (units > stock, value * stock / units),
+        else_=value + (stock - units) * Product.cost_price,
+    )
+
+    return float(
+        db.session.query(func.coalesce(func.sum(per_product), 0))
+        .select_from(Product)
+        .outerjoin(layers, layers.c.product_id == Product.id)
+        .scalar()
+    )
+
+
+def check_cost_layers(fix=False):
+    """
+    Compares each product's open layer units with its stock. Returns the
+    products that differ; with fix=True the gap is closed (an "opening" layer
+    at cost_price for missing units, oldest layers consumed for extra ones).
+    Caller commits.
+    """
+    units = func.coalesce(func.sum(CostLayer.remaining), 0)
+
+    rows = (
+        db.session.query(Product, units)
+        .outerjoin(CostLayer, (CostLayer.product_id == Product.id) & (CostLayer.remaining > 0))
+        .group_by(Product.id)
+        .having(units != func.greatest(Product.stock, 0))
+        .order_by(Product.id)
+        .all()
+    )
+
+    drift = []
+    for product, layer_units in rows:
+        layer_units = int(layer_units)
+        stock = max(product.stock or 0, 0)
+        drift.append({"id": product.id, "name": product.name, "stock": stock, "layer_units": layer_units})
+
+        if fix and stock > layer_units:
+            receive_layer(product, stock - layer_units, float(product.cost_price or 0), "opening")
+        elif fix:
+            consume_layers(product, layer_units - stock)
+
+    return drift
@@ -0,0 +1,17 @@
+# backend/utils/dates.py
+from datetime import datetime, timedelta
+from sqlalchemy import and_
+
+# Days after which a day's closes can no longer be adjusted
+LOCK_DAYS = 3
+
+
+def on_day(column, day):
+    """
+    Sargable "column falls on day" for Date or DateTime columns.
+    Use instead of func.date(column) == day, which hides the column from
+    its index: this compiles to column >= day AND column < day + 1.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    return and_(column >= day, column < day + timedelta(days=1))
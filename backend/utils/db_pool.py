@@ -0,0 +1,129 @@
+# backend/utils/db_pool.py
+import os
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+
+class PoolMetrics:
+    """Process-wide counters for pool checkouts (each gunicorn worker has its own pool)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.waited = 0          # checkouts that had to wait for a free connection
+            self.wait_total = 0.0    # seconds
+            self.wait_max = 0.0
+            self.timeouts = 0
+
+    def record(self, seconds, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            if waited:
+                self.waited += 1
+                self.wait_total += seconds
+                self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waited": self.waited,
+                "wait_total_ms": round(self.wait_total * 1000, 2),
+                "wait_avg_ms": round(self.wait_total * 1000 / self.waited, 2) if self.waited else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+                "timeouts": self.timeouts,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    # A checkout slower than this had to queue (or open a new connection)
+    WAIT_THRESHOLD = 0.001
+
+    def __init__(self, *args, max_overflow=10, **kw):
+        super().__init__(*args, max_overflow=max_overflow, **kw)
+        self.overflow_limit = max_overflow
+        self._checkout_depth = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get calls itself to retry when another thread takes
+        # the overflow slot first; only the outermost call is one checkout
+        depth = getattr(self._checkout_depth, "value", 0)
+        if depth:
+            return super()._do_get()
+
+        self._checkout_depth.value = 1
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            pool_metrics.record(time.perf_counter() - started, waited=True, timed_out=True)
+            raise
+        finally:
+            self._checkout_depth.value = 0
+
+        elapsed = time.perf_counter() - started
+        pool_metrics.record(elapsed, waited=elapsed > self.WAIT_THRESHOLD)
+        return connection
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def engine_options_from_env():
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the environment:
+      DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+      DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS (0 = off), DB_APPLICATION_NAME
+    Size it so workers x (pool size + overflow) stays under the server's
+    connection limit.
+    """
+    connect_args = {"application_name": os.getenv("DB_APPLICATION_NAME", "barpos-backend")}
+
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout > 0:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Render's managed Postgres drops idle SSL connections; recycle below that
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+        "connect_args": connect_args,
+    }
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pid": os.getpid(), "class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, TimedQueuePool):
+        status["max_overflow"] = pool.overflow_limit
+
+    status.update(pool_metrics.snapshot())
+    return status
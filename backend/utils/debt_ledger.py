@@ -0,0 +1,150 @@
+# backend/utils/debt_ledger.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from ..models.debtors import Debtor, DebtTransaction, DebtPayment, debtor_totals_subquery
+from ..extensions import db
+from .period_lock import ensure_period_open
+
+# Balances are floats; anything below this is rounding, not drift
+DRIFT_TOLERANCE = 0.005
+
+
+def record_debt(debtor_id, amount, description=None, issued_by=None, date=None, due_days=5):
+    """
+    Creates:
+      - DebtTransaction row (fully outstanding)
+      - matching increment of Debtor.total_outstanding
+    Returns the DebtTransaction object. Raises PeriodClosedError for a date
+    in a closed period. Caller commits.
+    """
+    date = date or datetime.utcnow()
+    ensure_period_open(date)
+
+    transaction = DebtTransaction(
+        debtor_id=debtor_id,
+        amount=amount,
+        paid_amount=0.0,
+        outstanding_amount=amount,
+        description=description,
+        issued_by=issued_by,
+        date=date,
+        due_date=date + timedelta(days=due_days),
+    )
+    db.session.add(transaction)
+
+    db.session.execute(
+        update(Debtor)
+        .where(Debtor.id == debtor_id)
+        .values(total_outstanding=Debtor.total_outstanding + amount)
+    )
+
+    return transaction
+
+
+def record_debt_payment(transaction, amount, received_by=None):
+    """
+    Creates:
+      - DebtPayment row
+      - atomic decrement of the transaction and debtor balances
+    The transaction update is guarded on the stored outstanding amount, so two
+    concurrent payments cannot overpay it. Raises ValueError if the payment
+    exceeds what is outstanding. Caller commits.
+    """
+    result = db.session.execute(
+        update(DebtTransaction)
+        .where(
+            DebtTransaction.id == transaction.id,
+            DebtTransaction.outstanding_amount >= amount,
+        )
+        .values(
+            paid_amount=DebtTransaction.paid_amount + amount,
+            outstanding_amount=DebtTransaction.outstanding_amount - amount,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+    if result.rowcount == 0:
+        raise ValueError("Amount exceeds outstanding debt")
+
+    db.session.execute(
+        update(Debtor)
+        .where(Debtor.id == transaction.debtor_id)
+        .values(total_outstanding=Debtor.total_outstanding - amount),
+        execution_options={"synchronize_session": False},
+    )
+
+    payment = DebtPayment(
+        transaction_id=transaction.id,
+        amount=amount,
+        received_by=received_by,
+    )
+    db.session.add(payment)
+
+    return payment
+
+
+def check_debt_balances(fix=False):
+    """
+    Recomputes every balance from DebtPayment rows and compares it with the
+    stored columns. Returns {"transactions": [...], "debtors": [...]} listing
+    each row that drifted; with fix=True the stored values are corrected too
+    (caller commits).
+    """
+    paid = (
+        select(
+            DebtPayment.transaction_id,
+            func.sum(DebtPayment.amount).label("paid"),
+        )
+        .group_by(DebtPayment.transaction_id)
+        .subquery()
+    )
+    actual_paid = func.coalesce(paid.c.paid, 0)
+
+    transaction_rows = (
+        db.session.query(DebtTransaction, actual_paid)
+        .outerjoin(paid, paid.c.transaction_id == DebtTransaction.id)
+        .filter(
+            (func.abs(DebtTransaction.paid_amount - actual_paid) > DRIFT_TOLERANCE) |
+            (func.abs(DebtTransaction.outstanding_amount - (DebtTransaction.amount - actual_paid)) > DRIFT_TOLERANCE)
+        )
+        .all()
+    )
+
+    totals = debtor_totals_subquery()
+    actual_debt = func.coalesce(totals.c.total_debt, 0)
+
+    debtor_rows = (
+        db.session.query(Debtor, actual_debt)
+        .outerjoin(totals, totals.c.debtor_id == Debtor.id)
+        .filter(func.abs(Debtor.total_outstanding - actual_debt) > DRIFT_TOLERANCE)
+        .all()
+    )
+
+    drift = {"transactions": [], "debtors": []}
+
+    for t, paid_amount in transaction_rows:
+        paid_amount = float(paid_amount)
+        drift["transactions"].append({
+            "id": t.id,
+            "debtor_id": t.debtor_id,
+            "stored_paid": float(t.paid_amount),
+            "actual_paid": paid_amount,
+            "stored_outstanding": float(t.outstanding_amount),
+            "actual_outstanding": float(t.amount) - paid_amount,
+        })
+        if fix:
+            t.paid_amount = paid_amount
+            t.outstanding_amount = float(t.amount) - paid_amount
+
+    for d, total_debt in debtor_rows:
+        drift["debtors"].append({
+            "id": d.id,
+            "name": d.name,
+            "stored_total": float(d.total_outstanding),
+            "actual_total": float(total_debt),
+        })
+        if fix:
+            d.total_outstanding = float(total_debt)
+
+    return drift
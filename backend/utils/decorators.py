@@ -1,21 +1,31 @@
 # backend/utils/decorators.py
 from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import jsonify
-from ..models.user import User
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import jsonify, current_app
+from .role_cache import role_cache
 
 def role_required(*roles):
     """
     Restricts route access to specified roles.
     Usage: @role_required("admin"), @role_required("cashier", "admin"), etc.
+
+    The role comes from the signed "role" claim set at login, so the check
+    costs no query. With ROLE_REVOCATION_CHECK enabled the current role is
+    looked up server-side instead, through a short TTL cache.
     """
     def decorator(fn):
         @wraps(fn)
         @jwt_required()
         def wrapper(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-            if user and user.role in roles:
+            role = get_jwt().get("role")
+
+            if role is None or current_app.config.get("ROLE_REVOCATION_CHECK"):
+                role = role_cache.get(
+                    str(get_jwt_identity()),
+                    current_app.config.get("ROLE_CACHE_TTL", 60)
+                )
+
+            if role in roles:
                 return fn(*args, **kwargs)
             return jsonify({"error": "Access denied"}), 403
         return wrapper
@@ -1,8 +1,8 @@
 # backend/utils/expense_helpers.py
 
 from ..models.reconciliation import Expense
-from ..models.cashmovements import CashMovement
 from ..extensions import db
+from .cash_ledger import record_cash_movement
 
 def record_expense(date, amount, description, category, user_id):
     """
@@ -22,15 +22,15 @@ def record_expense(date, amount, description, category, user_id):
     )
     db.session.add(expense)
 
-    # Create cash movement record
-    movement = CashMovement(
+    # Create cash movement record (also posts to the daily cash ledger)
+    record_cash_movement(
         date=date,
         source=f"Expense - {category}" if category else "Expense",
         type="outflow",
+        category="expense",
         amount=amount,
         description=description,
         recorded_by=user_id
     )
-    db.session.add(movement)
 
     return expense
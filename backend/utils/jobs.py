@@ -0,0 +1,96 @@
+# backend/utils/jobs.py
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class JobQueue:
+    """
+    In-process background queue (thread pool) for slow, DB-free work such as
+    PDF rendering. Jobs are keyed by the caller (e.g. a content hash) so the
+    same job is never queued twice. Each gunicorn worker has its own queue;
+    results must be written somewhere shared (disk) to be visible to the
+    others.
+    """
+
+    def __init__(self, max_failures=256):
+        self.max_failures = max_failures
+        self._executor = None
+        self._running = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, workers_key="PDF_WORKERS"):
+        workers = app.config.get(workers_key, 2)
+
+        if _gevent_patched():
+            # Monkey-patched threads are greenlets; CPU-bound jobs would stall
+            # every request on the worker. gevent's executor uses real threads.
+            from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+            self._executor = NativeThreadPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="barpos-job",
+            )
+
+    def submit(self, key, fn, *args):
+        """Queues fn(*args) under key unless it is already queued or running."""
+        with self._lock:
+            future = self._running.get(key)
+            if future is not None:
+                return future
+
+            self._failures.pop(key, None)
+            future = self._executor.submit(fn, *args)
+            self._running[key] = future
+
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._running.pop(key, None)
+            error = future.exception()
+            if error is not None:
+                if len(self._failures) >= self.max_failures:
+                    self._failures.clear()
+                self._failures[key] = str(error) or error.__class__.__name__
+
+    def status(self, key):
+        """"pending", "failed" or None (unknown to this worker)."""
+        with self._lock:
+            if key in self._running:
+                return "pending"
+            if key in self._failures:
+                return "failed"
+        return None
+
+    def error(self, key):
+        with self._lock:
+            return self._failures.get(key)
+
+    def wait(self, key, timeout):
+        """Blocks up to timeout seconds for a queued job. True if it finished OK."""
+        with self._lock:
+            future = self._running.get(key)
+        if future is None:
+            return self.status(key) is None
+        try:
+            future.result(timeout=timeout)
+            return True
+        except FutureTimeout:
+            return False
+        except Exception:
+            return False
+
+
+def _gevent_patched():
+    # Patching imports gevent first; don't import it just to ask
+    if "gevent" not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched("threading")
+
+
+pdf_jobs = JobQueue()
@@ -0,0 +1,41 @@
+# backend/utils/period_lock.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from ..models.period_close import PeriodClose
+from ..extensions import db
+from .dates import LOCK_DAYS
+
+
+class PeriodClosedError(ValueError):
+    """A write dated on or before the latest month-end close."""
+
+
+def closed_through():
+    """period_end of the latest close, or None."""
+    return db.session.query(func.max(PeriodClose.period_end)).scalar()
+
+
+def ensure_period_open(*dates):
+    """
+    Raises PeriodClosedError if any of dates falls in a closed period: the
+    snapshot has frozen its balances, so the write would never reach the
+    balance sheet. Reopen the period to post it: `flask periods reopen` or
+    DELETE /api/reports/periods/latest.
+    A period closes LOCK_DAYS after it ends at the earliest, so recent dates
+    skip the lookup.
+    """
+    dates = [d.date() if isinstance(d, datetime) else d for d in dates if d is not None]
+    if not dates:
+        return
+
+    earliest = min(dates)
+    if earliest >= datetime.utcnow().date() - timedelta(days=LOCK_DAYS):
+        return
+
+    closed = closed_through()
+    if closed and earliest <= closed:
+        raise PeriodClosedError(
+            f"Periods through {closed.isoformat()} are closed; "
+            f"cannot post to {earliest.isoformat()} until the period is reopened"
+        )
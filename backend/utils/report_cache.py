@@ -0,0 +1,230 @@
+# backend/utils/report_cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event, select, text
+from ..extensions import db
+
+# Bumped (after commit) by any transaction that touched report inputs or the
+# product catalogue (also the /api/products ETag). A sequence rather than a
+# counter row: nextval never blocks concurrent writers and is shared by
+# every gunicorn worker.
+data_version_seq = db.Sequence("data_version_seq", metadata=db.Model.metadata)
+
+
+def _report_models():
+    from ..models import (
+        Product, DailyClose, Sale, Debtor, DebtTransaction, Expense, Purchase,
+        FixedAsset, CashMovement, CashLedgerDay, CashFlowCategory, DailySalesFact,
+        PeriodClose, PurchaseOffer, SupplierPayment, CostLayer,
+    )
+    from ..models.product import DailyCloseAdjustment
+    from ..models.sales import SaleAdjustment
+    from ..models.debtors import DebtPayment
+
+    return (
+        Product, DailyClose, DailyCloseAdjustment, Sale, SaleAdjustment,
+        Debtor, DebtTransaction, DebtPayment, Expense, Purchase, FixedAsset,
+        CashMovement, CashLedgerDay, CashFlowCategory, DailySalesFact, PeriodClose,
+        PurchaseOffer, SupplierPayment, CostLayer,
+    )
+
+
+def current_data_version():
+    # A fresh sequence reports last_value 1 both before and after the first
+    # nextval; only is_called tells them apart
+    return db.session.execute(text(
+        "SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM data_version_seq"
+    )).scalar()
+
+
+def bump_data_version():
+    # Own connection: runs after the writer's commit is visible
+    with db.engine.connect() as conn:
+        conn.execute(select(data_version_seq.next_value()))
+        conn.commit()
+
+
+def closed_period_key(end):
+    """
+    Key suffix for a range ending on or before the latest month-end close,
+    None for open ranges. Writes into closed periods are rejected (see
+    utils.period_lock), so the suffix only changes when the close is redone
+    (new PeriodClose id) or the cash flow category mapping is edited.
+    """
+    from ..models.period_close import PeriodClose
+
+    if isinstance(end, datetime):
+        end = end.date()
+
+    latest = db.session.execute(
+        select(PeriodClose.id, PeriodClose.period_end)
+        .order_by(PeriodClose.period_end.desc())
+        .limit(1)
+    ).first()
+    if latest is None or end > latest.period_end:
+        return None
+
+    mapping = db.session.execute(text(
+        "SELECT md5(coalesce(string_agg(category || '=' || section, ',' ORDER BY category), ''))"
+        " FROM cash_flow_category"
+    )).scalar()
+    return f"closed{latest.id}.{mapping[:12]}"
+
+
+class LRUBackend:
+    """In-process LRU, per worker, capped at maxsize entries."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared across workers. Needs the optional redis package."""
+
+    def __init__(self, url, prefix="barpos:report:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REPORT_CACHE_BACKEND=redis requires the redis package")
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+
+class ReportCache:
+    """
+    Cache of computed report payloads keyed by (report, start, end).
+
+    Open ranges are keyed on the current data version as well, so any
+    committed write to a report input makes them miss; REPORT_CACHE_TTL
+    bounds anything the version can't see (raw SQL, date-dependent
+    depreciation). Reports registered with closed_periods=True are cached
+    without a version or TTL once their range ends inside a closed period
+    (see closed_period_key).
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = None
+
+    def init_app(self, app):
+        kind = app.config.get("REPORT_CACHE_BACKEND", "memory")
+
+        if kind == "memory":
+            self.backend = LRUBackend(maxsize=app.config.get("REPORT_CACHE_SIZE", 256))
+        elif kind == "redis":
+            self.backend = RedisBackend(app.config["REPORT_CACHE_URL"])
+        elif kind == "none":
+            self.backend = None
+        else:
+            raise RuntimeError(f"Unknown REPORT_CACHE_BACKEND: {kind}")
+
+        self.ttl = app.config.get("REPORT_CACHE_TTL", 300)
+
+        # Registered even without a backend: the data version also drives ETags
+        if not event.contains(db.session, "before_flush", _track_flush):
+            event.listen(db.session, "before_flush", _track_flush)
+            event.listen(db.session, "do_orm_execute", _track_execute)
+            event.listen(db.session, "after_commit", _after_commit)
+            event.listen(db.session, "after_rollback", _after_rollback)
+
+    def get_or_compute(self, report, start, end, compute, closed_periods=False):
+        """Returns the cached payload for the key, computing and storing it on a miss."""
+        if self.backend is None:
+            return compute()
+
+        key = f"{report}:{start.date() if start else ''}:{end.date() if end else ''}"
+
+        closed = closed_period_key(end) if closed_periods and end else None
+        if closed:
+            key, ttl = f"{key}:{closed}", None
+        else:
+            key, ttl = f"{key}:v{current_data_version()}", self.ttl
+
+        payload = self.backend.get(key)
+        if payload is None:
+            payload = compute()
+            self.backend.set(key, payload, ttl=ttl)
+
+        return payload
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+report_cache = ReportCache()
+
+
+# ---------------------
+# Session hooks
+# ---------------------
+def _track_flush(session, flush_context, instances):
+    if session.info.get("report_data_changed"):
+        return
+
+    models = _report_models()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, models):
+            session.info["report_data_changed"] = True
+            return
+
+
+def _track_execute(orm_execute_state):
+    # Bulk UPDATE / DELETE / upserts that never pass through the flush
+    if orm_execute_state.is_select:
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _report_models()):
+        orm_execute_state.session.info["report_data_changed"] = True
+
+
+def _after_commit(session):
+    if session.info.pop("report_data_changed", False):
+        bump_data_version()
+
+
+def _after_rollback(session):
+    session.info.pop("report_data_changed", None)
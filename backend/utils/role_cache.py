@@ -0,0 +1,49 @@
+# backend/utils/role_cache.py
+import threading
+import time
+from ..models.user import User
+
+
+class RoleCache:
+    """
+    Small per-process TTL cache of user_id -> role.
+    Only used when ROLE_REVOCATION_CHECK is on. Each gunicorn worker has its
+    own copy, so invalidation is local and the TTL bounds staleness elsewhere.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        user = User.query.get(user_id)
+        role = user.role if user else None
+
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[user_id] = (role, now + ttl)
+
+        return role
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(user_id), None)
+
+
+role_cache = RoleCache()
+
+
+def invalidate_user_role(user_id):
+    """Call after a user's role changes or the user is deleted."""
+    role_cache.invalidate(user_id)
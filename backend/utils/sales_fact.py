@@ -0,0 +1,129 @@
+# backend/utils/sales_fact.py
+
+from datetime import datetime
+from sqlalchemy import func, insert, select, delete, cast, Date, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..models.sales import Sale
+from ..models.product import DailyClose
+from ..models.sales_fact import DailySalesFact
+from ..extensions import db
+from .period_lock import ensure_period_open
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def post_sales_fact(date, product_id, source, units, revenue, cost):
+    """
+    Adds the deltas to the (date, product_id, source) fact row, creating it if
+    needed. Runs inside the caller's transaction. Raises PeriodClosedError
+    for a date in a closed period.
+    """
+    ensure_period_open(date)
+
+    stmt = pg_insert(DailySalesFact).values(
+        date=_as_date(date),
+        product_id=product_id,
+        source=source,
+        units=units,
+        revenue=revenue,
+        cost=cost,
+        profit=revenue - cost,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["date", "product_id", "source"],
+        set_={
+            "units": DailySalesFact.units + stmt.excluded.units,
+            "revenue": DailySalesFact.revenue + stmt.excluded.revenue,
+            "cost": DailySalesFact.cost + stmt.excluded.cost,
+            "profit": DailySalesFact.profit + stmt.excluded.profit,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def post_sales(sales, date=None):
+    """Posts new Sale rows, one upsert per product."""
+    date = date or datetime.utcnow().date()
+    totals = {}
+
+    for s in sales:
+        units, revenue, cost = totals.get(s.product_id, (0, 0.0, 0.0))
+        totals[s.product_id] = (units + s.quantity, revenue + s.total_price, cost + s.total_cost)
+
+    for product_id, (units, revenue, cost) in totals.items():
+        post_sales_fact(date, product_id, "sale", units, revenue, cost)
+
+
+def post_daily_closes(closes, date=None):
+    """Posts new DailyClose rows, one upsert per product."""
+    date = date or datetime.utcnow().date()
+    totals = {}
+
+    for c in closes:
+        units, revenue, profit = totals.get(c.product_id, (0, 0.0, 0.0))
+        totals[c.product_id] = (units + c.units_sold, revenue + c.revenue, profit + c.profit)
+
+    for product_id, (units, revenue, profit) in totals.items():
+        post_sales_fact(date, product_id, "close", units, revenue, revenue - profit)
+
+
+def sales_totals(source, start, end=None):
+    """
+    (units, revenue, cost, profit) for source over start..end inclusive
+    (a single day when end is omitted).
+    """
+    end = end or start
+
+    row = (
+        db.session.query(
+            func.coalesce(func.sum(DailySalesFact.units), 0),
+            func.coalesce(func.sum(DailySalesFact.revenue), 0),
+            func.coalesce(func.sum(DailySalesFact.cost), 0),
+            func.coalesce(func.sum(DailySalesFact.profit), 0),
+        )
+        .filter(
+            DailySalesFact.source == source,
+            DailySalesFact.date >= _as_date(start),
+            DailySalesFact.date <= _as_date(end),
+        )
+        .one()
+    )
+
+    return int(row[0]), float(row[1]), float(row[2]), float(row[3])
+
+
+def rebuild_sales_fact():
+    """
+    Recomputes the fact table from sale and daily_close. Used to backfill
+    history or repair drift. Returns the number of fact rows written.
+    """
+    db.session.execute(delete(DailySalesFact))
+
+    sale_date = cast(Sale.date, Date)
+    sales = select(
+        sale_date,
+        Sale.product_id,
+        literal("sale"),
+        func.sum(Sale.adjusted_quantity),
+        func.sum(Sale.adjusted_total_price),
+        func.sum(Sale.adjusted_total_cost),
+        func.sum(Sale.adjusted_total_price - Sale.adjusted_total_cost),
+    ).group_by(sale_date, Sale.product_id)
+
+    closes = select(
+        DailyClose.date,
+        DailyClose.product_id,
+        literal("close"),
+        func.sum(DailyClose.units_sold),
+        func.sum(DailyClose.revenue),
+        func.sum(DailyClose.revenue - DailyClose.profit),
+        func.sum(DailyClose.profit),
+    ).group_by(DailyClose.date, DailyClose.product_id)
+
+    columns = ["date", "product_id", "source", "units", "revenue", "cost", "profit"]
+    db.session.execute(insert(DailySalesFact).from_select(columns, sales))
+    db.session.execute(insert(DailySalesFact).from_select(columns, closes))
+
+    return db.session.query(func.count(DailySalesFact.id)).scalar()
@@ -0,0 +1,215 @@
+# backend/utils/supplier_ledger.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, cast, literal, select, update, Date
+from ..models.purchases import Supplier, Purchase, SupplierPayment, supplier_totals_subquery
+from ..extensions import db
+from .cash_ledger import record_cash_movement
+from .debt_ledger import DRIFT_TOLERANCE
+
+# Aged payables buckets: (key, oldest age in days, youngest age in days)
+AGING_BUCKETS = (
+    ("current", 30, 0),
+    ("days_31_60", 60, 31),
+    ("days_61_90", 90, 61),
+    ("over_90", None, 91),
+)
+
+
+def _supplier_status(owed, paid):
+    """SQL expression for Supplier.status given the (new) owed and paid values."""
+    return case(
+        (owed - paid <= DRIFT_TOLERANCE, "paid"),
+        (paid > 0, "partial"),
+        else_="unpaid",
+    )
+
+
+def _apply_supplier_delta(supplier_id, owed=0.0, paid=0.0):
+    owed_after = Supplier.total_amount_owed + owed
+    paid_after = Supplier.total_amount_paid + paid
+
+    db.session.execute(
+        update(Supplier)
+        .where(Supplier.id == supplier_id)
+        .values(
+            total_amount_owed=owed_after,
+            total_amount_paid=paid_after,
+            status=_supplier_status(owed_after, paid_after),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def post_supplier_invoices(purchases, sign=1):
+    """
+    Adds each purchase's total_cost to its supplier's owed balance, one
+    UPDATE per supplier. sign=-1 reverses them (purchase undo). Runs inside
+    the caller's transaction. Caller commits.
+    """
+    owed = {}
+    for purchase in purchases:
+        owed[purchase.supplier_id] = owed.get(purchase.supplier_id, 0.0) + sign * purchase.total_cost
+
+    for supplier_id in sorted(owed):
+        _apply_supplier_delta(supplier_id, owed=owed[supplier_id])
+
+
+def record_supplier_payment(supplier_id, amount, reference=None, paid_by=None, date=None):
+    """
+    Creates:
+      - SupplierPayment row
+      - atomic increment of Supplier.total_amount_paid
+      - matching cash outflow (category "supplier")
+    The supplier update is guarded on the stored balance, so two concurrent
+    payments cannot overpay it. Raises ValueError if the payment exceeds what
+    is owed. Caller commits.
+    """
+    date = date or datetime.utcnow()
+    paid_after = Supplier.total_amount_paid + amount
+
+    result = db.session.execute(
+        update(Supplier)
+        .where(
+            Supplier.id == supplier_id,
+            Supplier.total_amount_owed - Supplier.total_amount_paid >= amount - DRIFT_TOLERANCE,
+        )
+        .values(
+            total_amount_paid=paid_after,
+            status=_supplier_status(Supplier.total_amount_owed, paid_after),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+    if result.rowcount == 0:
+        raise ValueError("Amount exceeds balance owed to supplier")
+
+    payment = SupplierPayment(
+        supplier_id=supplier_id,
+        amount=amount,
+        reference=reference,
+        paid_by=paid_by,
+        date=date,
+    )
+    db.session.add(payment)
+
+    record_cash_movement(
+        date=date,
+        source="Supplier Payment",
+        type="outflow",
+        category="supplier",
+        amount=amount,
+        description=f"Payment to supplier {supplier_id}",
+        reference=reference,
+        recorded_by=paid_by,
+    )
+
+    return payment
+
+
+def aged_payables(as_of):
+    """
+    Amount owed per supplier as of the end of `as_of`, split by invoice age.
+    Payments settle the oldest invoices first: an invoice's unpaid part is
+    its running invoiced total less everything paid, clamped to the invoice.
+    One query; returns (rows, totals), rows ordered by balance descending.
+    """
+    cutoff = as_of + timedelta(days=1)
+
+    paid = (
+        select(SupplierPayment.supplier_id, func.sum(SupplierPayment.amount).label("paid"))
+        .where(SupplierPayment.date < cutoff)
+        .group_by(SupplierPayment.supplier_id)
+        .subquery()
+    )
+
+    running = func.sum(Purchase.total_cost).over(
+        partition_by=Purchase.supplier_id,
+        order_by=(Purchase.purchase_date, Purchase.id),
+    )
+    invoices = (
+        select(
+            Purchase.supplier_id,
+            Purchase.total_cost,
+            (literal(as_of, Date) - cast(Purchase.purchase_date, Date)).label("age"),
+            running.label("running"),
+        )
+        .where(Purchase.purchase_date < cutoff)
+        .subquery()
+    )
+
+    settled = func.coalesce(paid.c.paid, 0)
+    unpaid = func.greatest(0, func.least(invoices.c.total_cost, invoices.c.running - settled))
+
+    def bucket(oldest, youngest):
+        in_bucket = invoices.c.age >= youngest
+        if oldest is not None:
+            in_bucket = in_bucket & (invoices.c.age <= oldest)
+        return func.sum(case((in_bucket, unpaid), else_=0))
+
+    columns = [bucket(oldest, youngest).label(key) for key, oldest, youngest in AGING_BUCKETS]
+    balance = func.sum(unpaid).label("balance")
+
+    rows = (
+        db.session.query(Supplier.id, Supplier.name, *columns, balance)
+        .join(invoices, invoices.c.supplier_id == Supplier.id)
+        .outerjoin(paid, paid.c.supplier_id == Supplier.id)
+        .group_by(Supplier.id, Supplier.name)
+        .having(func.sum(unpaid) > DRIFT_TOLERANCE)
+        .order_by(balance.desc(), Supplier.id)
+        .all()
+    )
+
+    keys = [key for key, _, _ in AGING_BUCKETS] + ["balance"]
+    result = [
+        {
+            "supplier_id": row.id,
+            "supplier_name": row.name,
+            **{key: round(float(getattr(row, key)), 2) for key in keys},
+        }
+        for row in rows
+    ]
+    totals = {key: round(sum(r[key] for r in result), 2) for key in keys}
+
+    return result, totals
+
+
+def check_supplier_balances(fix=False):
+    """
+    Recomputes every supplier's invoiced / paid totals from Purchase and
+    SupplierPayment rows and compares them with the stored columns. Returns a
+    list of drifted suppliers; with fix=True the stored values (and status)
+    are corrected too (caller commits).
+    """
+    totals = supplier_totals_subquery()
+
+    rows = (
+        db.session.query(Supplier, totals.c.invoiced, totals.c.paid)
+        .join(totals, totals.c.supplier_id == Supplier.id)
+        .filter(
+            (func.abs(Supplier.total_amount_owed - totals.c.invoiced) > DRIFT_TOLERANCE) |
+            (func.abs(Supplier.total_amount_paid - totals.c.paid) > DRIFT_TOLERANCE)
+        )
+        .all()
+    )
+
+    drift = []
+    for s, invoiced, paid in rows:
+        invoiced, paid = float(invoiced), float(paid)
+        drift.append({
+            "id": s.id,
+            "name": s.name,
+            "stored_owed": float(s.total_amount_owed),
+            "actual_owed": invoiced,
+            "stored_paid": float(s.total_amount_paid),
+            "actual_paid": paid,
+        })
+        if fix:
+            s.total_amount_owed = invoiced
+            s.total_amount_paid = paid
+            if invoiced - paid <= DRIFT_TOLERANCE:
+                s.status = "paid"
+            else:
+                s.status = "partial" if paid > 0 else "unpaid"
+
+    return drift
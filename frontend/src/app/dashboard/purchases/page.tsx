@@ -36,6 +36,8 @@ export default function PurchasesPage() {
   const [products, setProducts] = useState<Product[]>([]);
   const [purchaseReport, setPurchaseReport] = useState<Purchase[]>([]);
   const [totalSpent, setTotalSpent] = useState(0);
+  const [purchaseCount, setPurchaseCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   const [form, setForm] = useState({
     product_id: "",
@@ -43,6 +45,7 @@ export default function PurchasesPage() {
     quantity: "",
     cost_price: "",
   });
+  const [paidOnDelivery, setPaidOnDelivery] = useState(true);
 
   const [newSupplier, setNewSupplier] = useState({
     name: "",
@@ -84,21 +87,31 @@ export default function PurchasesPage() {
     setProducts(res.data);
   };
 
-  const fetchPurchaseReport = async () => {
-    const res = await api.get("/api/purchases/report");
-    setPurchaseReport(res.data.purchases || []);
+  // The report is paginated: pass the last page's next_cursor to append
+  const fetchPurchaseReport = async (cursor?: string) => {
+    const res = await api.get("/api/purchases/report", {
+      params: cursor ? { cursor } : {},
+    });
+    const rows: Purchase[] = res.data.purchases || [];
+    setPurchaseReport((prev) => (cursor ? [...prev, ...rows] : rows));
     setTotalSpent(res.data.total_spent || 0);
+    setPurchaseCount(res.data.count || 0);
+    setNextCursor(res.data.next_cursor || null);
   };
 
   const handlePurchaseSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setLoading(true);
     try {
+      const quantity = Number(form.quantity);
+      const costPrice = parseFloat(form.cost_price);
       await api.post("/api/purchases", {
         product_id: Number(form.product_id),
         supplier_id: Number(form.supplier_id),
-        quantity: Number(form.quantity),
-        cost_price: parseFloat(form.cost_price),
+        quantity,
+        cost_price: costPrice,
+        // Unpaid purchases stay on the supplier's payables balance
+        amount_paid: paidOnDelivery ? quantity * costPrice : 0,
       });
       alert("✅ Purchase recorded successfully!");
       await Promise.all([fetchPurchaseReport(), fetchProducts()]);
@@ -227,6 +240,15 @@ export default function PurchasesPage() {
               </button>
             </div>
 
+            <label className="flex items-center space-x-2 text-sm text-gray-600">
+              <input
+                type="checkbox"
+                checked={paidOnDelivery}
+                onChange={(e) => setPaidOnDelivery(e.target.checked)}
+              />
+              <span>Paid on delivery (untick to owe the supplier)</span>
+            </label>
+
             <button
               type="submit"
               disabled={loading}
@@ -289,7 +311,7 @@ export default function PurchasesPage() {
           <div className="flex justify-between items-center mb-4">
             <h3 className="text-xl font-semibold text-indigo-700">📜 Purchase History</h3>
             <button
-              onClick={fetchPurchaseReport}
+              onClick={() => fetchPurchaseReport()}
               className="bg-gray-100 text-gray-700 text-xs px-4 py-2 rounded-xl border hover:bg-gray-200 transition"
             >
               Refresh
@@ -330,6 +352,17 @@ export default function PurchasesPage() {
                 </tbody>
               </table>
 
+              {nextCursor && (
+                <div className="text-center mt-4">
+                  <button
+                    onClick={() => fetchPurchaseReport(nextCursor)}
+                    className="bg-gray-100 text-gray-700 text-xs px-4 py-2 rounded-xl border hover:bg-gray-200 transition"
+                  >
+                    Load more ({purchaseReport.length} of {purchaseCount})
+                  </button>
+                </div>
+              )}
+
               <p className="text-right mt-5 text-gray-700 font-semibold">
                 💰 Total Spent:{" "}
                 <span className="text-indigo-700">
@@ -60,6 +60,20 @@ export default function ReconciliationPage() {
 
   async function downloadReport(reconId: number) {
   try {
+    // Queue the PDF and poll until it is rendered (cached ones are ready at
+    // once); give up after a minute, e.g. if the worker was recycled
+    const maxAttempts = 60;
+    let attempts = 0;
+    let job = await api.post(`/api/recon/${reconId}/report/jobs`);
+    while (job.data.status !== "ready") {
+      if (job.data.status === "failed") throw new Error(job.data.error);
+      if (++attempts > maxAttempts) throw new Error("report is taking too long, try again");
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      job = job.data.status === "not_started"
+        ? await api.post(`/api/recon/${reconId}/report/jobs`)
+        : await api.get(`/api/recon/${reconId}/report/status`);
+    }
+
     const res = await api.get(`/api/recon/${reconId}/report`, {
       responseType: "blob",
     });
@@ -71,8 +85,8 @@ export default function ReconciliationPage() {
     a.download = `reconciliation_${date}.pdf`;
     a.click();
     window.URL.revokeObjectURL(url);
-  } catch (err) {
-    alert("Failed to download report");
+  } catch (err: any) {
+    alert(err?.message ? `Failed to download report: ${err.message}` : "Failed to download report");
   }
 }
 
@@ -32,7 +32,9 @@ export default function SalesPage() {
   const fetchProducts = async () => {
     setLoading(true);
     try {
-      const res = await api.get("/api/products");
+      const res = await api.get("/api/products", {
+        params: { fields: "id,name,stock,unit_price" },
+      });
       setProducts(res.data);
 
       const saved = localStorage.getItem(draftKey);
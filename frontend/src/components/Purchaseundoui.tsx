@@ -20,15 +20,29 @@ export default function UndoPurchasesPage() {
   const [search, setSearch] = useState("");
   const [reason, setReason] = useState("");
   const [preview, setPreview] = useState<any[]>([]);
+  const [startDate, setStartDate] = useState("");
+  const [endDate, setEndDate] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState(0);
 
   useEffect(() => {
     fetchPurchases();
-  }, []);
+  }, [startDate, endDate]);
 
-  async function fetchPurchases() {
+  // Server-side date range; the report is paginated, so older rows are
+  // appended with next_cursor ("Load more")
+  async function fetchPurchases(cursor?: string) {
     try {
-      const res = await api.get("/api/purchases/report");
-      setPurchases(res.data.purchases || []);
+      const params: Record<string, string> = {};
+      if (startDate) params.start_date = startDate;
+      if (endDate) params.end_date = endDate;
+      if (cursor) params.cursor = cursor;
+
+      const res = await api.get("/api/purchases/report", { params });
+      const rows: Purchase[] = res.data.purchases || [];
+      setPurchases((prev) => (cursor ? [...prev, ...rows] : rows));
+      setNextCursor(res.data.next_cursor || null);
+      setTotal(res.data.count || 0);
     } catch (err) {
       console.error(err);
       alert("Failed to load purchases");
@@ -111,7 +125,29 @@ export default function UndoPurchasesPage() {
         Only use this if the purchase was recorded in error.
       </div>
 
-      {/* SEARCH */}
+      {/* FILTERS */}
+      <div className="flex gap-3 mb-2 text-sm">
+        <label className="flex items-center gap-2">
+          From
+          <input
+            type="date"
+            value={startDate}
+            onChange={(e) => setStartDate(e.target.value)}
+            className="border px-2 py-1"
+          />
+        </label>
+        <label className="flex items-center gap-2">
+          To
+          <input
+            type="date"
+            value={endDate}
+            onChange={(e) => setEndDate(e.target.value)}
+            className="border px-2 py-1"
+          />
+        </label>
+      </div>
+
+      {/* SEARCH (within the loaded purchases) */}
       <input
         placeholder="Search by product or supplier..."
         value={search}
@@ -153,6 +189,15 @@ export default function UndoPurchasesPage() {
         </tbody>
       </table>
 
+      {nextCursor && (
+        <button
+          onClick={() => fetchPurchases(nextCursor)}
+          className="mt-2 border px-4 py-2 text-sm bg-gray-50"
+        >
+          Load more ({purchases.length} of {total})
+        </button>
+      )}
+
       {/* ACTIONS */}
       <div className="mt-4 flex gap-3 items-start">
         <div className="flex-1">